@@ -0,0 +1,53 @@
+"""
+Cold-start benchmark: time a fresh interpreter that imports main.py and
+builds one MacroChefGenerator, for the csv and pandas CSV backends.
+Run from the repo root: python benchmarks/bench_startup.py [--runs N]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_SNIPPET = "from main import MacroChefGenerator; MacroChefGenerator(customer_plan='{plan}')"
+
+def time_cold_start(backend, plan, runs):
+    env = dict(os.environ, MACROCHEF_CSV_BACKEND=backend)
+    command = [sys.executable, "-c", STARTUP_SNIPPET.format(plan=plan)]
+    # One untimed run so the on-disk vector cache exists for both backends
+    subprocess.run(command, cwd=REPO_DIR, env=env, check=True, capture_output=True)
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=REPO_DIR, env=env, check=True, capture_output=True)
+        timings.append(time.perf_counter() - start)
+    return {
+        "backend": backend,
+        "plan": plan,
+        "runs": runs,
+        "median_ms": round(statistics.median(timings) * 1000, 2),
+        "min_ms": round(min(timings) * 1000, 2),
+        "max_ms": round(max(timings) * 1000, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generator cold start per CSV backend.")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--plan", default="SUB")
+    args = parser.parse_args()
+
+    results = [time_cold_start(backend, args.plan, args.runs) for backend in ("csv", "pandas")]
+    by_backend = {r["backend"]: r for r in results}
+    print(json.dumps({
+        "benchmark": "cold_start",
+        "results": results,
+        "speedup": round(by_backend["pandas"]["median_ms"] / by_backend["csv"]["median_ms"], 2),
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Benchmark suite: synthetic order workloads built from the repo's DBs for
+every mode and both plans. Measures cold start, per-prompt latency
+percentiles, prompt size (full vs compact), matcher throughput on
+fuzzy-heavy inputs, tracemalloc peak, and FinalCheckGenerator.create_prompt
+/ check cost. Prints (or writes) one JSON document; --compare flags
+regressions against a previous run.
+Run from the repo root: python benchmarks/bench_suite.py [--quick] [--output FILE]
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from bench_startup import time_cold_start
+from ingredient_matcher import IngredientMatcher
+from llm_pipeline import templated_response
+from main import MacroChefGenerator, order_to_kwargs
+from final_check import FinalCheckGenerator
+from plan_registry import clear_registry, get_plan_resources
+from instrumentation import logger
+
+PLANS = ("SUB", "DEMO")
+MODES = ("prefab", "custom_prefab", "full_custom")
+SERVING_SIZES = ["1", "2", "3", "4", "1.5", "6"]
+PREFAB_DISHES = ["Paneer Chilla", "Egg Bhurji", "Chicken Curry", "Rajma Chawal", "Soya Pulao"]
+FULL_CUSTOM_REQUESTS = [
+    "High protein breakfast with eggs and oats",
+    "Low carb dinner, paneer and vegetables",
+    "Post-workout chicken rice bowl, mild spice",
+    "Vegan lunch under 500 kcal",
+]
+CUSTOMIZATIONS = [None, None, "less oil", "no onion no garlic", "extra spicy"]
+LANGUAGES = [None, "hindi", "bengali", "tamil"]
+OPTION_FIELDS = {"Salad Meal": "dressing_choice", "Chinese Bowl": "carb_choice", "Sandwich": "sauce_choice"}
+
+# Metrics where a larger value is a regression (everything else: smaller is worse)
+HIGHER_IS_WORSE = ("_ms", "_kb", "_mb", "_chars")
+
+@contextlib.contextmanager
+def quiet_logs():
+    """Silence generator warnings (unmatched ingredients, unknown variants) while timing."""
+    level = logger.level
+    logger.setLevel(logging.ERROR)
+    try:
+        yield
+    finally:
+        logger.setLevel(level)
+
+def make_orders(plan, mode, count, seed):
+    """Deterministic synthetic orders for one plan/mode drawn from the plan's DBs."""
+    rng = random.Random(f"{seed}-{plan}-{mode}")
+    resources = get_plan_resources(plan, REPO_DIR)
+    sides = list(resources.side_dish_db) + [None]
+    carbs = list(resources.carb_db) + [None]
+    variants = sorted(resources.variant_index.variants)
+
+    orders = []
+    for i in range(count):
+        order = {
+            "order_id": f"{plan}-{mode}-{i}",
+            "customer_plan": plan,
+            "mode": mode,
+            "customization_string": rng.choice(CUSTOMIZATIONS),
+            "translation_lang": rng.choice(LANGUAGES),
+        }
+        if mode == "prefab":
+            order.update(dish_title=rng.choice(PREFAB_DISHES), serving_size=rng.choice(SERVING_SIZES),
+                         side_title=rng.choice(sides), carb_side_title=rng.choice(carbs))
+        elif mode == "custom_prefab" and variants:
+            base, protein, option = rng.choice(variants)
+            order.update(dish_title=base, protein_choice=protein, serving_size=rng.choice(SERVING_SIZES),
+                         side_title=rng.choice(sides))
+            order[OPTION_FIELDS[resources.variant_index.base_types[base]]] = option
+        else:
+            order["full_custom_request"] = rng.choice(FULL_CUSTOM_REQUESTS)
+        orders.append(order)
+    return orders
+
+def fuzz_name(name, rng):
+    """A misspelt / re-cased / padded variant of an ingredient name."""
+    chars = list(name)
+    for _ in range(rng.randint(1, 2)):
+        if len(chars) < 3:
+            break
+        pos = rng.randrange(len(chars) - 1)
+        edit = rng.choice(("swap", "drop", "insert", "replace"))
+        if edit == "swap":
+            chars[pos], chars[pos + 1] = chars[pos + 1], chars[pos]
+        elif edit == "drop":
+            del chars[pos]
+        elif edit == "insert":
+            chars.insert(pos, rng.choice("aeiourstn"))
+        else:
+            chars[pos] = rng.choice("aeiourstn")
+    text = "".join(chars)
+    return rng.choice((text, text.upper(), f"  {text} ", text.title()))
+
+def percentiles(timings):
+    ordered = sorted(timings)
+    def pick(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+    return {
+        "count": len(ordered),
+        "p50_ms": round(pick(50) * 1000, 4),
+        "p95_ms": round(pick(95) * 1000, 4),
+        "p99_ms": round(pick(99) * 1000, 4),
+        "mean_ms": round(statistics.mean(ordered) * 1000, 4),
+        "throughput_per_s": round(len(ordered) / sum(ordered), 1) if sum(ordered) else None,
+    }
+
+def timed_calls(func, inputs):
+    timings = []
+    for item in inputs:
+        start = time.perf_counter()
+        func(item)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def bench_cold_start(runs):
+    return {plan: time_cold_start("csv", plan, runs) for plan in PLANS}
+
+def bench_prompt_latency(count, seed):
+    results = {}
+    for plan in PLANS:
+        generator = MacroChefGenerator(customer_plan=plan, base_dir=REPO_DIR)
+        for mode in MODES:
+            orders = make_orders(plan, mode, count, seed)
+            kwargs = [order_to_kwargs(order) for order in orders]
+            with quiet_logs():
+                generator.create_prompt(**kwargs[0])
+                timings = timed_calls(lambda kw: generator.create_prompt(**kw), kwargs)
+            results[f"{plan}/{mode}"] = percentiles(timings)
+    return results
+
+def bench_prompt_size(count, seed):
+    """Mean rendered prompt size per plan/mode, full vs compact encoding."""
+    results = {}
+    for plan in PLANS:
+        generator = MacroChefGenerator(customer_plan=plan, base_dir=REPO_DIR)
+        for mode in MODES:
+            kwargs = [order_to_kwargs(order) for order in make_orders(plan, mode, count, seed)]
+            with quiet_logs():
+                full = [len(generator.create_prompt(**kw)) for kw in kwargs]
+                compact = [len(generator.create_prompt(**{**kw, "compact": True})) for kw in kwargs]
+            results[f"{plan}/{mode}"] = {
+                "full_mean_chars": round(statistics.mean(full), 1),
+                "compact_mean_chars": round(statistics.mean(compact), 1),
+                "compact_max_chars": max(compact),
+                "compact_saving": round(1 - sum(compact) / sum(full), 3),
+            }
+    return results
+
+def bench_matcher(count, seed):
+    results = {}
+    for plan in PLANS:
+        rng = random.Random(f"{seed}-{plan}-matcher")
+        domain = get_plan_resources(plan, REPO_DIR).master_ingredient_domain
+        inputs = [fuzz_name(rng.choice(domain), rng) for _ in range(count)]
+        inputs += [rng.choice(domain) for _ in range(count // 4)]
+        inputs += ["".join(rng.choice("abcdefghijklmnop") for _ in range(rng.randint(4, 14))) for _ in range(count // 4)]
+        rng.shuffle(inputs)
+
+        matcher = IngredientMatcher(domain)
+        start = time.perf_counter()
+        matched = sum(1 for item in inputs if matcher.match(item)[1] != -1)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        for item in inputs:
+            matcher.match(item)
+        warm = time.perf_counter() - start
+
+        generator = MacroChefGenerator(customer_plan=plan, base_dir=REPO_DIR)
+        lists = [inputs[i:i + 12] for i in range(0, len(inputs), 12)]
+        with quiet_logs():
+            vector_timings = timed_calls(generator._generate_binary_vector, lists)
+
+        results[plan] = {
+            "inputs": len(inputs),
+            "matched": matched,
+            "cold_per_s": round(len(inputs) / cold, 1),
+            "memoized_per_s": round(len(inputs) / warm, 1),
+            "binary_vector_12_items": percentiles(vector_timings),
+        }
+    return results
+
+def bench_memory(count, seed):
+    results = {}
+    for plan in PLANS:
+        orders = [order for mode in MODES for order in make_orders(plan, mode, count, seed)]
+        clear_registry()
+        tracemalloc.start()
+        generator = MacroChefGenerator(customer_plan=plan, base_dir=REPO_DIR)
+        after_init = tracemalloc.get_traced_memory()
+        with quiet_logs():
+            for order in orders:
+                generator.create_prompt(**order_to_kwargs(order))
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[plan] = {
+            "orders": len(orders),
+            "init_peak_kb": round(after_init[1] / 1024, 1),
+            "peak_kb": round(peak / 1024, 1),
+            "retained_kb": round(current / 1024, 1),
+        }
+    return results
+
+def bench_final_check(count, seed):
+    results = {}
+    for plan in PLANS:
+        generator = MacroChefGenerator(customer_plan=plan, base_dir=REPO_DIR)
+        checker = FinalCheckGenerator(customer_plan=plan, base_dir=REPO_DIR)
+        orders = [order for mode in ("prefab", "custom_prefab") for order in make_orders(plan, mode, count // 2, seed)]
+        with quiet_logs():
+            outputs = [templated_response(generator.create_prompt(**order_to_kwargs(order))) for order in orders]
+        results[plan] = {
+            "create_prompt": percentiles(timed_calls(checker.create_prompt, outputs)),
+            "local_check": percentiles(timed_calls(checker.check, outputs)),
+        }
+    return results
+
+def _flatten(data, prefix=""):
+    for key, value in data.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from _flatten(value, path + ".")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield path, value
+
+def compare(current, previous, threshold):
+    """Metrics that moved the wrong way by more than threshold (fraction)."""
+    old = dict(_flatten(previous.get("results", {})))
+    regressions = []
+    for path, value in _flatten(current["results"]):
+        before = old.get(path)
+        if not before or path.endswith(("count", "inputs", "orders", "matched", "runs")):
+            continue
+        change = (value - before) / before
+        worse = change > threshold if path.endswith(HIGHER_IS_WORSE) else change < -threshold
+        if worse:
+            regressions.append({"metric": path, "before": before, "after": value, "change": round(change, 3)})
+    return regressions
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the MacroChef benchmark suite and print JSON results.")
+    parser.add_argument("--orders", type=int, default=300, help="Synthetic orders per plan/mode")
+    parser.add_argument("--matcher-inputs", type=int, default=4000)
+    parser.add_argument("--cold-runs", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--quick", action="store_true", help="Small workloads for a fast smoke run")
+    parser.add_argument("--only", nargs="+", choices=["cold_start", "prompt_latency", "prompt_size", "matcher", "memory", "final_check"])
+    parser.add_argument("--output", help="Also write the JSON document to this file")
+    parser.add_argument("--compare", help="Previous JSON result to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Regression threshold as a fraction (default 0.15)")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.orders, args.matcher_inputs, args.cold_runs = 40, 500, 2
+
+    suite = {
+        "cold_start": lambda: bench_cold_start(args.cold_runs),
+        "prompt_latency": lambda: bench_prompt_latency(args.orders, args.seed),
+        "prompt_size": lambda: bench_prompt_size(args.orders, args.seed),
+        "matcher": lambda: bench_matcher(args.matcher_inputs, args.seed),
+        "memory": lambda: bench_memory(args.orders, args.seed),
+        "final_check": lambda: bench_final_check(args.orders, args.seed),
+    }
+    results = {name: run() for name, run in suite.items() if not args.only or name in args.only}
+
+    document = {
+        "benchmark": "suite",
+        "meta": {
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "orders_per_mode": args.orders,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            document["regressions"] = compare(document, json.load(f), args.threshold)
+
+    text = json.dumps(document, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    if document.get("regressions"):
+        exit(1)
+
+if __name__ == "__main__":
+    main()
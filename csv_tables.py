@@ -0,0 +1,128 @@
+import csv
+import re
+
+# pandas.read_csv default na_values (matched exactly, no stripping)
+NA_VALUES = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+}
+TRUE_VALUES = {"True", "TRUE", "true"}
+FALSE_VALUES = {"False", "FALSE", "false"}
+INT_PATTERN = re.compile(r"^\s*[+-]?\d+\s*$")
+FLOAT_PRECISION = 6
+
+class Table:
+    """
+    Minimal stand-in for the DataFrames main.py/final_check.py used to build:
+    column names plus typed column values, with None for missing cells.
+    """
+    def __init__(self, columns, data, dtypes=None):
+        self.columns = columns
+        self.data = data  # one list of values per column
+        self.dtypes = dtypes or ["str"] * len(columns)
+
+    def __len__(self):
+        return len(self.data[0]) if self.data else 0
+
+    def to_string(self, index=False):
+        return format_table(self)
+
+def _dedupe_columns(header):
+    # Same renaming pandas applies to repeated header names: "x", "x.1", "x.2", ...
+    seen = {}
+    columns = []
+    for name in header:
+        if name in seen:
+            seen[name] += 1
+            new_name = f"{name}.{seen[name]}"
+            while new_name in seen:
+                seen[name] += 1
+                new_name = f"{name}.{seen[name]}"
+            seen[new_name] = 0
+            columns.append(new_name)
+        else:
+            seen[name] = 0
+            columns.append(name)
+    return columns
+
+def _convert_column(raw_values):
+    # Infer the column dtype the way read_csv would for these simple cases
+    values = [None if v in NA_VALUES else v for v in raw_values]
+    present = [v for v in values if v is not None]
+    if not present:
+        return values, "float"
+    if all(v in TRUE_VALUES or v in FALSE_VALUES for v in present) and len(present) == len(values):
+        return [v in TRUE_VALUES for v in values], "bool"
+    if all(INT_PATTERN.match(v) for v in present):
+        if len(present) == len(values):
+            return [int(v) for v in values], "int"
+        return [None if v is None else float(v) for v in values], "float"
+    try:
+        return [None if v is None else float(v) for v in values], "float"
+    except ValueError:
+        return values, "str"
+
+def read_table(path):
+    """Read a CSV into a Table (pandas.read_csv semantics for the repo's files)."""
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        rows = [row for row in csv.reader(f) if row]
+    if not rows:
+        return Table([], [])
+
+    columns = _dedupe_columns(rows[0])
+    body = rows[1:]
+    data = []
+    dtypes = []
+    for col_idx in range(len(columns)):
+        raw = [row[col_idx] if col_idx < len(row) else "" for row in body]
+        values, dtype = _convert_column(raw)
+        data.append(values)
+        dtypes.append(dtype)
+    return Table(columns, data, dtypes)
+
+def melt_unique(table):
+    """
+    Column-wise flatten with missing cells dropped and duplicates removed,
+    in the same order as pd.melt(df)['value'].dropna().unique().
+    Returns [(value, column_name), ...] keeping each value's first column.
+    """
+    seen = set()
+    result = []
+    for column, values in zip(table.columns, table.data):
+        for value in values:
+            if value is None or value in seen:
+                continue
+            seen.add(value)
+            result.append((value, column))
+    return result
+
+def _format_floats(values):
+    # Fixed precision, then trim trailing zeros shared by every value (pandas style).
+    # Very large/small magnitudes that pandas would print in scientific notation are not replicated.
+    texts = [None if v is None else f"{v:.{FLOAT_PRECISION}f}" for v in values]
+    present = [t for t in texts if t is not None]
+    if present:
+        trim = min(len(t) - len(t.rstrip("0")) for t in present)
+        trim = min(trim, FLOAT_PRECISION - 1)
+        if trim:
+            texts = [None if t is None else t[:-trim] for t in texts]
+    return ["NaN" if t is None else t for t in texts]
+
+def _format_column(values, dtype):
+    if dtype == "float":
+        return _format_floats(values)
+    return ["NaN" if v is None else str(v) for v in values]
+
+def format_table(table):
+    """Same text as DataFrame.to_string(index=False): right-justified, single-space separated."""
+    if len(table) == 0:
+        return f"Empty DataFrame\nColumns: [{', '.join(table.columns)}]\nIndex: []"
+    columns = []
+    for name, values, dtype in zip(table.columns, table.data, table.dtypes):
+        cells = _format_column(values, dtype)
+        # pandas reserves a sign space in numeric column headers
+        if dtype != "str":
+            name = " " + name
+        width = max([len(name)] + [len(c) for c in cells])
+        columns.append([name.rjust(width)] + [c.rjust(width) for c in cells])
+    return "\n".join(" ".join(row) for row in zip(*columns))
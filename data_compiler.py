@@ -0,0 +1,186 @@
+"""
+Offline data-integrity compiler: resolves every active ingredient name in
+the recipe DBs against each plan's ingredient domain once, writes a
+resolved index per plan that PlanResources preloads into the matcher memo,
+and reports names that do not resolve or resolve ambiguously.
+
+    python data_compiler.py [--plans SUB DEMO] [--report resolution_report.json] [--strict]
+"""
+
+import argparse
+import json
+import os
+from ingredient_matcher import IngredientMatcher
+from vector_cache import CACHE_DIR, fingerprint_files, iter_entry_lists, stat_stamps
+from instrumentation import logger
+
+INDEX_VERSION = 1
+# Every DB whose ingredient names are compiled (recipe_bank.json is the legacy copy of the custom bank)
+SOURCE_DBS = {
+    "side_dish_db": "side_dish_db.json",
+    "carb_db": "carb_db.json",
+    "recipe_bank": "custom_recipe_bank.json",
+    "legacy_recipe_bank": "recipe_bank.json",
+}
+# Fuzzy matches whose runner-up scores within this margin of the winner are reported as ambiguous
+AMBIGUITY_MARGIN = 0.05
+MAX_USES = 10
+
+def index_path(base_dir, customer_plan):
+    return os.path.join(base_dir, CACHE_DIR, f"resolved_{customer_plan}.json")
+
+def source_files(base_dir, customer_plan):
+    return [os.path.join(base_dir, f"ingredients_{customer_plan}.csv")] + \
+           [os.path.join(base_dir, name) for name in SOURCE_DBS.values()]
+
+def _load_sources(base_dir):
+    databases = {}
+    for db_name, filename in SOURCE_DBS.items():
+        path = os.path.join(base_dir, filename)
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            databases[db_name] = json.load(f)
+    return databases
+
+def compile_plan(customer_plan, domain, databases):
+    """
+    Resolve every distinct raw ingredient name used by databases against
+    domain. Returns (resolutions, report): resolutions maps raw name ->
+    [matched_name, idx, kind, score] with kind "exact", "fuzzy" or
+    "unresolved"; report groups the problems.
+    """
+    matcher = IngredientMatcher(domain)
+    uses = {}
+    for db_name, entry_key, serving_key, active_list in iter_entry_lists(databases):
+        where = f"{db_name}/{entry_key}" + (f"/{serving_key}" if serving_key else "")
+        for name in active_list:
+            uses.setdefault(name, []).append(where)
+
+    resolutions = {}
+    report = {"plan": customer_plan, "domain_size": len(domain), "names": len(uses),
+              "exact": 0, "fuzzy": 0, "unresolved": [], "ambiguous": [], "fuzzy_matches": []}
+
+    normalized = {}
+    for name in domain:
+        normalized.setdefault(name.lower().strip(), []).append(name)
+    report["duplicate_domain_names"] = [names for names in normalized.values() if len(names) > 1]
+
+    for name in sorted(uses):
+        where = uses[name][:MAX_USES]
+        matched, idx = matcher.match(name)
+        if idx == -1:
+            resolutions[name] = [None, -1, "unresolved", 0.0]
+            report["unresolved"].append({"name": name, "uses": where, "use_count": len(uses[name])})
+            continue
+
+        if name.lower().strip() in matcher.exact_index:
+            resolutions[name] = [matched, idx, "exact", 1.0]
+            report["exact"] += 1
+            if len(normalized[name.lower().strip()]) > 1:
+                report["ambiguous"].append({"name": name, "chosen": matched, "reason": "duplicate domain name",
+                                            "candidates": normalized[name.lower().strip()], "uses": where})
+            continue
+
+        scored = matcher.scored_matches(name)
+        score = round(scored[0][0], 4)
+        resolutions[name] = [matched, idx, "fuzzy", score]
+        report["fuzzy"] += 1
+        report["fuzzy_matches"].append({"name": name, "resolved": matched, "score": score})
+        if len(scored) > 1 and scored[0][0] - scored[1][0] <= AMBIGUITY_MARGIN:
+            report["ambiguous"].append({
+                "name": name, "chosen": matched, "reason": "close fuzzy scores",
+                "candidates": [[candidate, round(value, 4)] for value, candidate in scored[:5]],
+                "uses": where,
+            })
+    return resolutions, report
+
+def write_index(path, customer_plan, files, domain, resolutions, fingerprint=None):
+    """
+    Store resolutions with the content hash of files (computed unless given)
+    and their stat stamps, which let load_resolved_index skip the hash.
+    """
+    data = {
+        "version": INDEX_VERSION,
+        "plan": customer_plan,
+        "fingerprint": fingerprint or fingerprint_files(files),
+        "stat": stat_stamps(files),
+        "domain_length": len(domain),
+        "resolutions": resolutions,
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def _stale(path, customer_plan):
+    logger.info("Resolved index %s is stale; run data_compiler.py to rebuild it", path,
+                extra={"event": "resolved_index_stale", "plan": customer_plan})
+    return None
+
+def load_resolved_index(base_dir, customer_plan, domain):
+    """
+    {raw name: (matched_name, idx)} from the compiled index, or None when it
+    is missing or was compiled from different CSV/DB contents. The sources are
+    only content-hashed when their mtime/size differ from the stored stamps;
+    if the contents still match, the stamps are refreshed.
+    """
+    path = index_path(base_dir, customer_plan)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    files = source_files(base_dir, customer_plan)
+    if data.get("version") != INDEX_VERSION or data.get("domain_length") != len(domain):
+        return _stale(path, customer_plan)
+    if data.get("stat") != stat_stamps(files):
+        # Files touched since compiling: only a content change makes the index stale
+        fingerprint = fingerprint_files(files)
+        if data.get("fingerprint") != fingerprint:
+            return _stale(path, customer_plan)
+        try:
+            write_index(path, customer_plan, files, domain, data["resolutions"], fingerprint)
+        except OSError:
+            pass
+    return {name: (matched, idx) for name, (matched, idx, _, _) in data["resolutions"].items()}
+
+def format_report(report):
+    lines = [f"{report['plan']}: {report['names']} names -> {report['exact']} exact, "
+             f"{report['fuzzy']} fuzzy, {len(report['unresolved'])} unresolved, {len(report['ambiguous'])} ambiguous"]
+    for item in report["unresolved"]:
+        lines.append(f"  UNRESOLVED  {item['name']!r} ({item['use_count']} uses, e.g. {item['uses'][0]})")
+    for item in report["ambiguous"]:
+        lines.append(f"  AMBIGUOUS   {item['name']!r} -> {item['chosen']!r} ({item['reason']}: {item['candidates']})")
+    for names in report["duplicate_domain_names"]:
+        lines.append(f"  DUPLICATE   domain names {names}")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    from plan_registry import get_plan_resources
+
+    parser = argparse.ArgumentParser(description="Pre-resolve DB ingredient names against each plan's domain.")
+    parser.add_argument("--plans", nargs="+", default=["SUB", "DEMO"])
+    parser.add_argument("--base-dir", default=".")
+    parser.add_argument("--report", default="resolution_report.json", help="JSON report path")
+    parser.add_argument("--strict", action="store_true", help="Exit 1 if any name is unresolved or ambiguous")
+    args = parser.parse_args()
+
+    base_dir = os.path.abspath(args.base_dir)
+    databases = _load_sources(base_dir)
+    reports = {}
+    for plan in args.plans:
+        domain = get_plan_resources(plan, base_dir).master_ingredient_domain
+        resolutions, report = compile_plan(plan, domain, databases)
+        path = index_path(base_dir, plan)
+        write_index(path, plan, source_files(base_dir, plan), domain, resolutions)
+        reports[plan] = report
+        print(format_report(report))
+        print(f"  -> {path}")
+
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump({"plans": reports}, f, ensure_ascii=False, indent=2)
+    print(f"Report: {args.report}")
+    problems = sum(len(r["unresolved"]) + len(r["ambiguous"]) for r in reports.values())
+    exit(1 if args.strict and problems else 0)
@@ -1,62 +1,92 @@
-import jinja2
-import pandas as pd
 import json
+import argparse
+from plan_registry import get_plan_resources
+from instrumentation import get_metrics, logger
 
 class FinalCheckGenerator:
-    def __init__(self, customer_plan="SUB"):
+    def __init__(self, customer_plan="SUB", base_dir="."):
         self.customer_plan = customer_plan
-        self.loader = jinja2.FileSystemLoader(searchpath="./")
-        self.env = jinja2.Environment(loader=self.loader)
+        self.metrics = get_metrics()
 
-        # Load plan-specific template and ingredients
-        template_file = f"final_check_prompt_{customer_plan}.jinja"
-        ingredients_file = f"ingredients_{customer_plan}.csv"
+        # Shared per-process plan resources (see plan_registry.py)
+        self.resources = get_plan_resources(customer_plan, base_dir)
+        self.env = self.resources.env
+        self.template = self.resources.final_check_template
 
-        self.template = self.env.get_template(template_file)
+        self.df_ingredients = self.resources.df_ingredients
+        self.master_ingredients = self.resources.master_ingredients
+        self.master_ingredient_domain = self.resources.master_ingredient_domain
+        self.ingredient_categories = self.resources.ingredient_categories
+        self.vector_length = len(self.master_ingredient_domain)
+        self.validator = self.resources.validator
 
-        try:
-            self.df_ingredients = pd.read_csv(ingredients_file)
-            self.master_ingredients = self.df_ingredients.to_string(index=False)
-
-            # Get vector length
-            raw_list = pd.melt(self.df_ingredients)['value'].dropna().unique().tolist()
-            self.vector_length = len(raw_list)
-
-        except Exception as e:
-            print(f"CRITICAL ERROR LOADING CSV: {e}")
-            self.master_ingredients = ""
-            self.vector_length = 0
+        # Static header (master list, vector constraints) rendered once per plan
+        self.prompt_template = self.resources.prerendered_template(self.template.name, {
+            "master_ingredient_list": self.master_ingredients,
+            "vector_length": self.vector_length,
+        })
+        # Same header with the index:name domain used by compact MacroChef prompts
+        self.compact_template = self.resources.prerendered_template(self.template.name, {
+            "master_ingredient_list": self.resources.compact_ingredients,
+            "vector_length": self.vector_length,
+            "compact": True,
+        })
 
-    def create_prompt(self, llm_ingredients_output):
+    def create_prompt(self, llm_ingredients_output, compact=False):
         """
         Generate a prompt for LLM to validate and correct the ingredients output.
+        compact=True lists the domain as index:name pairs (as in compact recipe prompts).
         """
         context = {
             "master_ingredient_list": self.master_ingredients,
             "vector_length": self.vector_length,
-            "llm_output": llm_ingredients_output
+            "llm_output": llm_ingredients_output,
+            "compact": compact,
         }
 
-        return self.template.render(context)
+        template = self.compact_template if compact else self.prompt_template
+        with self.metrics.timer("stage", stage="render", plan=self.customer_plan, generator="final_check"):
+            return template.render(context)
+
+    def check(self, llm_ingredients_output, compact=False):
+        """
+        Validate locally first; only build the LLM validation prompt when the
+        local check cannot settle the result (unknown ingredients, nothing parsed).
+        Returns {"status", "report", "prompt"}; prompt is None unless escalated.
+        """
+        with self.metrics.timer("stage", stage="validate", plan=self.customer_plan, generator="final_check"):
+            report = self.validator.validate(llm_ingredients_output, compact)
+        self.metrics.incr("final_check_status", plan=self.customer_plan, status=report.status)
+        prompt = None if report.settled else self.create_prompt(llm_ingredients_output, compact)
+        return {"status": report.status, "report": report, "prompt": prompt}
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate LLM ingredient output.")
+    parser.add_argument("--llm", action="store_true", help="Always print the LLM validation prompt (skip the local check)")
+    parser.add_argument("--compact", action="store_true", help="List the domain as index:name pairs in the validation prompt")
+    args = parser.parse_args()
+
     # Load customer_plan from recipe_config.json
     try:
         with open("recipe_config.json", "r") as f:
             config = json.load(f)
         customer_plan = config.get("customer_plan", "SUB")
     except FileNotFoundError:
-        print("WARNING: recipe_config.json not found. Using default plan 'SUB'.")
+        logger.warning("recipe_config.json not found. Using default plan 'SUB'.")
         customer_plan = "SUB"
 
     try:
         with open("llm_output.txt", "r") as f:
             llm_output = f.read()
     except FileNotFoundError:
-        print("ERROR: llm_output.txt not found.")
-        print("Please create llm_output.txt and paste the ingredients portion of the LLM output there.")
+        logger.error("llm_output.txt not found. Please create llm_output.txt and paste the ingredients portion of the LLM output there.")
         exit(1)
 
     generator = FinalCheckGenerator(customer_plan=customer_plan)
-    print(generator.create_prompt(llm_output))
+    if args.llm:
+        print(generator.create_prompt(llm_output, args.compact))
+    else:
+        result = generator.check(llm_output, args.compact)
+        # Settled locally: print the final data directly; otherwise fall back to the LLM prompt
+        print(result["prompt"] if result["prompt"] else result["report"].format())
@@ -0,0 +1,103 @@
+import difflib
+
+class IngredientMatcher:
+    """
+    Prebuilt lookup index over a plan's master ingredient domain.
+    Gives the same answers as the old linear scan + difflib fallback, but
+    exact hits are a dict lookup, fuzzy hits only score candidates that
+    share a bigram with the input, and every answer is memoized.
+    """
+    def __init__(self, master_list, cutoff=0.8):
+        self.master_list = list(master_list)
+        self.cutoff = cutoff
+
+        # 1. EXACT INDEX (normalized name -> first position, like the old scan)
+        self.exact_index = {}
+        # First position of each raw name, replaces master_list.index()
+        self.position_index = {}
+        for idx, master_item in enumerate(self.master_list):
+            self.exact_index.setdefault(master_item.lower().strip(), idx)
+            self.position_index.setdefault(master_item, idx)
+
+        # 2. BIGRAM CANDIDATE INDEX (case-sensitive, as difflib compares raw strings)
+        self.bigram_index = {}
+        for master_item in self.position_index:
+            for gram in self._bigrams(master_item):
+                self.bigram_index.setdefault(gram, set()).add(master_item)
+
+        # 3. MEMO (raw input -> (matched_name, idx))
+        self.memo = {}
+        # Slow-path counts (memo misses that were not exact hits), for metrics
+        self.fuzzy_lookups = 0
+        self.fuzzy_hits = 0
+
+    @staticmethod
+    def _bigrams(text):
+        return {text[i:i + 2] for i in range(len(text) - 1)}
+
+    def _candidates(self, input_ing):
+        candidates = set()
+        for gram in self._bigrams(input_ing):
+            candidates.update(self.bigram_index.get(gram, ()))
+
+        # Two strings sharing no bigram can only reach ratio >= 0.8 when their
+        # combined length is <= 5, so those short names are always scored.
+        max_len = 5 - len(input_ing)
+        if max_len > 0:
+            candidates.update(item for item in self.position_index if len(item) <= max_len)
+        return candidates
+
+    def _fuzzy_match(self, input_ing):
+        # Mirrors difflib.get_close_matches(input_ing, master_list, n=1, cutoff)
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(input_ing)
+        best = None
+        for candidate in self._candidates(input_ing):
+            matcher.set_seq1(candidate)
+            if matcher.real_quick_ratio() >= self.cutoff and \
+               matcher.quick_ratio() >= self.cutoff:
+                score = matcher.ratio()
+                if score >= self.cutoff and (best is None or (score, candidate) > best):
+                    best = (score, candidate)
+        return best[1] if best else None
+
+    def scored_matches(self, input_ing):
+        """
+        Every domain name scoring >= cutoff against input_ing, best first, as
+        (score, name). The first entry is what match() picks; used offline to
+        spot ambiguous fuzzy matches.
+        """
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(input_ing)
+        scored = []
+        for candidate in self._candidates(input_ing):
+            matcher.set_seq1(candidate)
+            if matcher.real_quick_ratio() >= self.cutoff and matcher.quick_ratio() >= self.cutoff:
+                score = matcher.ratio()
+                if score >= self.cutoff:
+                    scored.append((score, candidate))
+        return sorted(scored, reverse=True)
+
+    def preseed(self, resolutions):
+        """Load precomputed answers {raw input: (matched_name, idx)} into the memo."""
+        self.memo.update(resolutions)
+
+    def match(self, input_ing):
+        """Return (matched_name, idx) or (None, -1) if nothing is close enough."""
+        if input_ing in self.memo:
+            return self.memo[input_ing]
+
+        idx = self.exact_index.get(input_ing.lower().strip())
+        if idx is not None:
+            result = (self.master_list[idx], idx)
+        else:
+            self.fuzzy_lookups += 1
+            best_match = self._fuzzy_match(input_ing)
+            if best_match is not None:
+                self.fuzzy_hits += 1
+                result = (best_match, self.position_index[best_match])
+            else:
+                result = (None, -1)
+
+        self.memo[input_ing] = result
+        return result
@@ -0,0 +1,175 @@
+import base64
+
+class IngredientVector:
+    """
+    Binary ingredient vector over a plan's master domain, stored as a Python
+    int bitset (bit i = domain position i). Python ints give arbitrary-width
+    bitwise ops and popcount in C without adding a bitarray/NumPy dependency.
+
+    Text form matches the prompts and LLM output: "[0, 1, 0, ...]".
+    Packed form is ceil(length / 8) little-endian bytes (position 0 is the
+    lowest bit of the first byte), encoded as hex or base64.
+    """
+    __slots__ = ("bits", "length")
+
+    def __init__(self, bits=0, length=0):
+        if bits < 0 or bits >> length:
+            raise ValueError(f"bits do not fit in a vector of length {length}")
+        self.bits = bits
+        self.length = length
+
+    # --- CONSTRUCTION ---
+    @classmethod
+    def from_indices(cls, indices, length):
+        bits = 0
+        for idx in indices:
+            if not 0 <= idx < length:
+                raise IndexError(f"index {idx} out of range for vector of length {length}")
+            bits |= 1 << idx
+        return cls(bits, length)
+
+    @classmethod
+    def from_list(cls, values):
+        bits = 0
+        for idx, value in enumerate(values):
+            if value not in (0, 1):
+                raise ValueError(f"non-binary value {value!r} at position {idx}")
+            if value:
+                bits |= 1 << idx
+        return cls(bits, len(values))
+
+    @classmethod
+    def from_text(cls, text):
+        """Parse "[0, 1, 0]" (brackets optional, comma or whitespace separated)."""
+        body = text.strip().strip("[]")
+        tokens = body.replace(",", " ").split()
+        try:
+            values = [int(token.strip("'\"")) for token in tokens]
+        except ValueError:
+            raise ValueError(f"vector text is not a list of 0/1 values: {text[:80]!r}")
+        return cls.from_list(values)
+
+    @classmethod
+    def from_bytes(cls, data, length):
+        return cls(int.from_bytes(data, "little"), length)
+
+    @classmethod
+    def from_hex(cls, text, length):
+        return cls.from_bytes(bytes.fromhex(text), length)
+
+    @classmethod
+    def from_base64(cls, text, length):
+        return cls.from_bytes(base64.b64decode(text), length)
+
+    @classmethod
+    def union_all(cls, vectors, length):
+        bits = 0
+        for vector in vectors:
+            if vector.length != length:
+                raise ValueError(f"vector length {vector.length} != {length}")
+            bits |= vector.bits
+        return cls(bits, length)
+
+    # --- SERIALIZATION ---
+    def to_list(self):
+        bits = self.bits
+        return [(bits >> i) & 1 for i in range(self.length)]
+
+    def to_text(self):
+        """Same text as str() of the equivalent Python list."""
+        return str(self.to_list())
+
+    def to_bytes(self):
+        return self.bits.to_bytes((self.length + 7) // 8, "little")
+
+    def to_hex(self):
+        return self.to_bytes().hex()
+
+    def to_base64(self):
+        return base64.b64encode(self.to_bytes()).decode("ascii")
+
+    def to_numpy(self):
+        """uint8 array of 0/1 values (requires numpy)."""
+        import numpy as np
+        packed = np.frombuffer(self.to_bytes(), dtype=np.uint8)
+        return np.unpackbits(packed, bitorder="little")[:self.length]
+
+    # --- QUERIES ---
+    def count(self):
+        """Number of set positions (popcount)."""
+        return self.bits.bit_count()
+
+    def indices(self):
+        bits = self.bits
+        result = []
+        while bits:
+            low = bits & -bits
+            result.append(low.bit_length() - 1)
+            bits ^= low
+        return result
+
+    def names(self, domain):
+        return [domain[idx] for idx in self.indices()]
+
+    def diff(self, other):
+        """
+        Compare against another vector (e.g. an LLM's <ing_vec>).
+        Returns (missing, extra): positions set here but not in other, and vice versa.
+        """
+        self._check_length(other)
+        return (IngredientVector(self.bits & ~other.bits, self.length).indices(),
+                IngredientVector(other.bits & ~self.bits, self.length).indices())
+
+    # --- SET OPERATIONS ---
+    def _check_length(self, other):
+        if not isinstance(other, IngredientVector):
+            raise TypeError(f"expected IngredientVector, got {type(other).__name__}")
+        if other.length != self.length:
+            raise ValueError(f"vector length mismatch: {self.length} vs {other.length}")
+
+    def __or__(self, other):
+        self._check_length(other)
+        return IngredientVector(self.bits | other.bits, self.length)
+
+    def __and__(self, other):
+        self._check_length(other)
+        return IngredientVector(self.bits & other.bits, self.length)
+
+    def __sub__(self, other):
+        self._check_length(other)
+        return IngredientVector(self.bits & ~other.bits, self.length)
+
+    def __xor__(self, other):
+        self._check_length(other)
+        return IngredientVector(self.bits ^ other.bits, self.length)
+
+    # --- PROTOCOL ---
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, idx):
+        if idx < 0:
+            idx += self.length
+        if not 0 <= idx < self.length:
+            raise IndexError("vector index out of range")
+        return (self.bits >> idx) & 1
+
+    def __iter__(self):
+        return iter(self.to_list())
+
+    def __bool__(self):
+        return self.bits != 0
+
+    def __eq__(self, other):
+        if not isinstance(other, IngredientVector):
+            return NotImplemented
+        return self.bits == other.bits and self.length == other.length
+
+    def __hash__(self):
+        return hash((self.bits, self.length))
+
+    def __repr__(self):
+        return f"IngredientVector(length={self.length}, count={self.count()}, hex={self.to_hex()!r})"
+
+    def __str__(self):
+        return self.to_text()
@@ -0,0 +1,244 @@
+"""
+Diagnostics for the generator pipeline: the "macrochef" logger (plain or
+JSON lines on stderr, never mixed into prompt output) and a process-wide
+Metrics registry with per-stage timers, labelled counters and gauges,
+exported to pluggable sinks.
+
+Metrics are off by default and cost one attribute check per call site.
+Enable them with MACROCHEF_METRICS=1 (in-memory), MACROCHEF_METRICS_FILE=path
+(Prometheus text file), or enable_metrics(sinks) from code.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+LOGGER_NAME = "macrochef"
+logger = logging.getLogger(LOGGER_NAME)
+
+# Context fields passed via extra={...} that the JSON formatter includes
+LOG_FIELDS = ("event", "plan", "db", "entry", "items", "stage", "seconds", "error")
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, message plus any LOG_FIELDS given in extra."""
+    def format(self, record):
+        entry = {
+            "time": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in LOG_FIELDS:
+            if hasattr(record, field):
+                entry[field] = getattr(record, field)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+def configure_logging(level=logging.WARNING, json_format=False, stream=None):
+    """(Re)install the macrochef handler: plain "LEVEL: message" or JSON lines, on stderr by default."""
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonFormatter() if json_format else logging.Formatter("%(levelname)s: %(message)s"))
+    for existing in list(logger.handlers):
+        logger.removeHandler(existing)
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    return handler
+
+configure_logging(
+    level=os.environ.get("MACROCHEF_LOG_LEVEL", "WARNING").upper(),
+    json_format=os.environ.get("MACROCHEF_LOG_FORMAT", "") == "json",
+)
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_TIMER = _NullTimer()
+
+class _Timer:
+    __slots__ = ("metrics", "name", "labels", "start")
+
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+class Metrics:
+    """
+    Counters (name + labels -> total), timers (name + labels -> count, sum,
+    max seconds) and gauges, collected in-process. Call sites guard with
+    `if metrics.enabled` or use timer(), which is a shared no-op when
+    disabled. Collectors are callables returning [(gauge name, labels, value)],
+    evaluated at snapshot time (e.g. cache hit rates); adding one under an
+    existing key replaces it.
+    """
+    def __init__(self, enabled=False, sinks=None):
+        self.enabled = enabled
+        self.sinks = list(sinks or [])
+        self.counters = {}
+        self.timers = {}
+        self.collectors = {}
+        self.lock = threading.Lock()
+
+    def incr(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self.lock:
+            stats = self.timers.get(key)
+            if stats is None:
+                self.timers[key] = [1, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                stats[2] = max(stats[2], seconds)
+
+    def timer(self, name, **labels):
+        """Context manager timing one stage; NULL_TIMER when metrics are disabled."""
+        if not self.enabled:
+            return NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def add_collector(self, key, collector):
+        self.collectors[key] = collector
+
+    def snapshot(self):
+        """{"counters", "timers", "gauges"} as lists of plain dicts."""
+        with self.lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value}
+                        for (name, labels), value in sorted(self.counters.items())]
+            timers = [{"name": name, "labels": dict(labels), "count": count, "sum": total, "max": longest}
+                      for (name, labels), (count, total, longest) in sorted(self.timers.items())]
+        gauges = []
+        for collector in list(self.collectors.values()):
+            for name, labels, value in collector():
+                gauges.append({"name": name, "labels": labels, "value": value})
+        return {"counters": counters, "timers": timers, "gauges": gauges}
+
+    def flush(self):
+        """Send the current snapshot to every sink."""
+        if not self.sinks:
+            return
+        snapshot = self.snapshot()
+        for sink in self.sinks:
+            sink.export(snapshot)
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.timers.clear()
+
+class InMemorySink:
+    """Keeps every exported snapshot; latest is the most recent one."""
+    def __init__(self):
+        self.snapshots = []
+
+    @property
+    def latest(self):
+        return self.snapshots[-1] if self.snapshots else None
+
+    def export(self, snapshot):
+        self.snapshots.append(snapshot)
+
+class LogSink:
+    """Emits each snapshot as one structured "metrics" log record at INFO."""
+    def export(self, snapshot):
+        logger.info("metrics %s", json.dumps(snapshot, default=str), extra={"event": "metrics"})
+
+def _prometheus_name(name):
+    return "macrochef_" + "".join(ch if ch.isalnum() else "_" for ch in name)
+
+def _prometheus_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in labels.values())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + "}"
+
+class PrometheusFileSink:
+    """
+    Writes the snapshot in Prometheus text exposition format to path
+    (atomically, for node_exporter's textfile collector or similar).
+    Counters become *_total, timers *_seconds_count/_sum/_max, gauges as-is.
+    """
+    def __init__(self, path):
+        self.path = path
+
+    def render(self, snapshot):
+        lines = []
+        seen = set()
+
+        def declare(metric, kind):
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f"# TYPE {metric} {kind}")
+
+        for counter in snapshot["counters"]:
+            metric = _prometheus_name(counter["name"]) + "_total"
+            declare(metric, "counter")
+            lines.append(f"{metric}{_prometheus_labels(counter['labels'])} {counter['value']}")
+        # Each metric's samples must be contiguous: all count/sum pairs, then the max gauges
+        for timer in snapshot["timers"]:
+            base = _prometheus_name(timer["name"]) + "_seconds"
+            labels = _prometheus_labels(timer["labels"])
+            declare(base, "summary")
+            lines.append(f"{base}_count{labels} {timer['count']}")
+            lines.append(f"{base}_sum{labels} {timer['sum']:.9f}")
+        for timer in snapshot["timers"]:
+            base = _prometheus_name(timer["name"]) + "_seconds_max"
+            declare(base, "gauge")
+            lines.append(f"{base}{_prometheus_labels(timer['labels'])} {timer['max']:.9f}")
+        for gauge in snapshot["gauges"]:
+            metric = _prometheus_name(gauge["name"])
+            declare(metric, "gauge")
+            lines.append(f"{metric}{_prometheus_labels(gauge['labels'])} {gauge['value']}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, snapshot):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.render(snapshot))
+        os.replace(tmp_path, self.path)
+
+def _metrics_from_environment():
+    sinks = []
+    if os.environ.get("MACROCHEF_METRICS_FILE"):
+        sinks.append(PrometheusFileSink(os.environ["MACROCHEF_METRICS_FILE"]))
+    enabled = bool(sinks) or os.environ.get("MACROCHEF_METRICS", "") not in ("", "0")
+    return Metrics(enabled=enabled, sinks=sinks)
+
+METRICS = _metrics_from_environment()
+
+def get_metrics():
+    return METRICS
+
+def enable_metrics(*sinks):
+    """Turn on the process-wide registry and add sinks; returns it."""
+    METRICS.enabled = True
+    METRICS.sinks.extend(sinks)
+    return METRICS
@@ -0,0 +1,326 @@
+"""
+Async LLM dispatch pipeline: render orders with MacroChefGenerator, send the
+prompts through a pluggable async LLM client, then validate each response
+locally (escalating to the final_check prompt only when needed).
+
+    python llm_pipeline.py --orders orders.jsonl --output results.jsonl --mock
+"""
+
+import argparse
+import ast
+import asyncio
+import importlib
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+from main import MacroChefGenerator, load_orders, order_to_kwargs
+from final_check import FinalCheckGenerator
+from response_cache import ResponseCache, cache_key
+from instrumentation import PrometheusFileSink, enable_metrics, get_metrics
+
+class LLMClient:
+    """
+    Interface for LLM backends. Implement complete() for a real provider and
+    pass an instance to RecipePipeline (or --client module:Class on the CLI).
+    Raise any exception for a failed call; the pipeline retries it.
+    """
+    async def complete(self, prompt):
+        raise NotImplementedError
+
+INVENTORY_LINE = re.compile(r"^> List: (\[.*\])\s*$", re.MULTILINE)
+VECTOR_LINE = re.compile(r"^> Vector: (\[.*\])\s*$", re.MULTILINE)
+VALIDATE_INPUT = re.compile(r'INPUT TO VALIDATE:\n"""\n(.*?)\n"""', re.DOTALL)
+
+def templated_response(prompt):
+    """
+    Offline stand-in for an LLM answer: merges the precomputed inventory
+    lists/vectors already in the prompt into <final_ing_list>/<final_ing_vec>.
+    For final_check prompts it echoes the input being validated.
+    """
+    to_validate = VALIDATE_INPUT.search(prompt)
+    if to_validate:
+        return to_validate.group(1)
+
+    items = []
+    for raw in INVENTORY_LINE.findall(prompt):
+        try:
+            items.extend(item for item in ast.literal_eval(raw) if item not in items)
+        except (ValueError, SyntaxError):
+            continue
+    merged = None
+    for raw in VECTOR_LINE.findall(prompt):
+        if raw == "[]":
+            continue
+        vector = ast.literal_eval(raw)
+        merged = vector if merged is None else [a | b for a, b in zip(merged, vector)]
+
+    lines = ["MOCK SOP: follow the component instructions above.", ""]
+    if items:
+        lines.append(f"<final_ing_list>: [{', '.join(items)}]")
+    if merged is not None:
+        lines.append(f"<final_ing_vec>: {merged}")
+    return "\n".join(lines)
+
+class MockLLMClient(LLMClient):
+    """
+    Local backend for offline throughput/latency runs. Sleeps latency +/- jitter
+    seconds, fails a failure_rate fraction of calls (to exercise retries) and
+    returns canned_response if given, else responder(prompt).
+    """
+    def __init__(self, latency=0.05, jitter=0.0, failure_rate=0.0, canned_response=None, responder=templated_response, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.canned_response = canned_response
+        self.responder = responder
+        self.random = random.Random(seed)
+        self.calls = 0
+
+    async def complete(self, prompt):
+        self.calls += 1
+        delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+        await asyncio.sleep(delay)
+        if self.random.random() < self.failure_rate:
+            raise ConnectionError("mock LLM transient failure")
+        if self.canned_response is not None:
+            return self.canned_response
+        return self.responder(prompt)
+
+class RateLimiter:
+    """Token bucket: at most `rate` calls per second, with bursts up to `burst`."""
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+# Outcome fields stored in / restored from the response cache
+CACHED_FIELDS = ["status", "response", "validation", "final_output"]
+
+class RecipePipeline:
+    """
+    Renders orders, dispatches prompts with bounded concurrency, retries with
+    exponential backoff, optional rate limiting, then validates each response.
+    With a ResponseCache, orders whose normalized context was already answered
+    (for unchanged plan data) skip the LLM entirely.
+    """
+    def __init__(self, client, concurrency=8, max_retries=3, backoff=0.5, max_backoff=8.0, rate_limit=None, validate=True, base_dir=".", cache=None):
+        self.client = client
+        self.cache = cache
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.rate_limiter = RateLimiter(rate_limit) if rate_limit else None
+        self.validate = validate
+        self.base_dir = base_dir
+        self.generators = {}
+        self.checkers = {}
+        # cache key -> Future of the first in-flight order with that key
+        self.inflight = {}
+
+    def _generator(self, plan):
+        if plan not in self.generators:
+            self.generators[plan] = MacroChefGenerator(customer_plan=plan, base_dir=self.base_dir)
+        return self.generators[plan]
+
+    def _checker(self, plan):
+        if plan not in self.checkers:
+            self.checkers[plan] = FinalCheckGenerator(customer_plan=plan, base_dir=self.base_dir)
+        return self.checkers[plan]
+
+    async def _call_llm(self, prompt, record):
+        """Call the client with retries; counts attempts on the record."""
+        for attempt in range(self.max_retries + 1):
+            if self.rate_limiter:
+                await self.rate_limiter.acquire()
+            record["attempts"] += 1
+            try:
+                with get_metrics().timer("stage", stage="llm"):
+                    return await self.client.complete(prompt)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                get_metrics().incr("llm_retries", error=type(e).__name__)
+                record.setdefault("retry_errors", []).append(f"{type(e).__name__}: {e}")
+                delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    async def process_order(self, index, order, semaphore):
+        plan = order.get("customer_plan") or "SUB"
+        record = {
+            "index": index,
+            "order_id": order.get("order_id"),
+            "customer_plan": plan,
+            "mode": order.get("mode") or "prefab",
+            "status": None,
+            "response": None,
+            "validation": None,
+            "final_output": None,
+            "attempts": 0,
+            "cache": None,
+            "error": None,
+        }
+        async with semaphore:
+            # Latency covers render + LLM calls + validation, not time queued for a slot
+            start = time.perf_counter()
+            key = future = None
+            try:
+                generator = self._generator(plan)
+                if self.cache is not None:
+                    key = cache_key(order, generator.resources.content_fingerprint)
+                    cached = self.cache.get(key)
+                    record["cache"] = "hit"
+                    # Identical order already being answered: wait for it instead of a duplicate call.
+                    # If it failed (None), another waiter may have taken over the key; wait on that one.
+                    while cached is None and key in self.inflight:
+                        cached = await asyncio.shield(self.inflight[key])
+                        record["cache"] = "shared"
+                    if cached is not None:
+                        if record["cache"] == "shared":
+                            self.cache.record_shared()
+                        record.update(cached)
+                        return self._finish(record, start)
+                    record["cache"] = "miss"
+                    future = self.inflight[key] = asyncio.get_running_loop().create_future()
+
+                kwargs = order_to_kwargs(order)
+                prompt = generator.create_prompt(**kwargs)
+                record["response"] = await self._call_llm(prompt, record)
+
+                if not self.validate:
+                    record["status"] = "done"
+                else:
+                    # An escalation prompt uses the same domain encoding as the recipe prompt
+                    check = self._checker(plan).check(record["response"], kwargs["compact"])
+                    record["validation"] = check["report"].to_dict()
+                    if check["prompt"] is None:
+                        record["status"] = check["status"]
+                        record["final_output"] = check["report"].format()
+                    else:
+                        record["status"] = "escalated"
+                        record["final_output"] = await self._call_llm(check["prompt"], record)
+
+                if future is not None:
+                    outcome = {field: record[field] for field in CACHED_FIELDS}
+                    self.cache.set(key, outcome)
+                    self._release(key, future, outcome)
+            except Exception as e:
+                record["status"] = "failed"
+                record["error"] = f"{type(e).__name__}: {e}"
+                # Waiters get None; the first to wake makes its own call and the rest wait on it
+                if future is not None:
+                    self._release(key, future, None)
+            return self._finish(record, start)
+
+    def _release(self, key, future, outcome):
+        """Hand outcome to this order's waiters; only this order's own future is removed."""
+        if self.inflight.get(key) is future:
+            del self.inflight[key]
+        if not future.done():
+            future.set_result(outcome)
+
+    def _finish(self, record, start):
+        record["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return record
+
+    async def run(self, orders):
+        """Process every order; returns records in input order."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = [self.process_order(index, order, semaphore) for index, order in enumerate(orders)]
+        return await asyncio.gather(*tasks)
+
+def summarize(records, wall_seconds, cache=None):
+    latencies = sorted(r["latency_ms"] for r in records) or [0.0]
+    statuses = {}
+    cache_outcomes = {}
+    for record in records:
+        statuses[record["status"]] = statuses.get(record["status"], 0) + 1
+        if record.get("cache"):
+            cache_outcomes[record["cache"]] = cache_outcomes.get(record["cache"], 0) + 1
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(round(p / 100 * (len(latencies) - 1))))]
+
+    return {
+        "orders": len(records),
+        "statuses": statuses,
+        "llm_calls": sum(r["attempts"] for r in records),
+        "wall_s": round(wall_seconds, 3),
+        "throughput_per_s": round(len(records) / wall_seconds, 2) if wall_seconds else None,
+        "latency_ms": {
+            "p50": percentile(50),
+            "p95": percentile(95),
+            "p99": percentile(99),
+            "mean": round(statistics.mean(latencies), 2),
+        },
+        "cache": dict(cache.report(), orders=cache_outcomes) if cache is not None else None,
+    }
+
+def load_client(spec):
+    """Instantiate a client from "module:ClassName"."""
+    module_name, _, class_name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render orders and dispatch them to an LLM asynchronously.")
+    parser.add_argument("--orders", required=True, help="JSONL or CSV order sheet")
+    parser.add_argument("--output", default="results.jsonl", help="Output JSONL (default: results.jsonl)")
+    parser.add_argument("--client", help="LLM client as module:ClassName (implements LLMClient)")
+    parser.add_argument("--mock", action="store_true", help="Use the local MockLLMClient backend")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock latency in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Mock transient failure rate")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--rate", type=float, default=None, help="Max LLM calls per second")
+    parser.add_argument("--cache", nargs="?", const=os.path.join(".macrochef_cache", "responses.sqlite"),
+                        help="Reuse responses from a SQLite response cache (default path if no value given)")
+    parser.add_argument("--cache-ttl", type=float, default=7 * 24 * 3600, help="Response cache TTL in seconds")
+    parser.add_argument("--metrics-file", help="Write stage timings, counters and cache gauges here in Prometheus text format")
+    args = parser.parse_args()
+
+    if args.metrics_file:
+        enable_metrics(PrometheusFileSink(args.metrics_file))
+
+    if args.mock:
+        client = MockLLMClient(latency=args.latency, jitter=args.latency / 2, failure_rate=args.failure_rate)
+    elif args.client:
+        client = load_client(args.client)
+    else:
+        print("ERROR: no LLM backend configured. Pass --mock or --client module:ClassName.")
+        exit(1)
+
+    cache = ResponseCache(args.cache, ttl=args.cache_ttl) if args.cache else None
+    if cache is not None:
+        get_metrics().add_collector("response_cache", lambda: [
+            (f"response_cache_{name}", {}, value) for name, value in cache.report().items()
+        ])
+    pipeline = RecipePipeline(client, concurrency=args.concurrency, max_retries=args.retries, rate_limit=args.rate, cache=cache)
+    orders = list(load_orders(args.orders))
+    start = time.perf_counter()
+    records = asyncio.run(pipeline.run(orders))
+    wall = time.perf_counter() - start
+
+    with open(args.output, "w") as out:
+        for record in records:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    print(json.dumps(summarize(records, wall, cache), indent=2), file=sys.stderr)
+    get_metrics().flush()
+    if cache is not None:
+        cache.close()
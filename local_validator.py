@@ -0,0 +1,187 @@
+import re
+from ingredient_matcher import IngredientMatcher
+from ingredient_vector import IngredientVector
+
+LIST_TAG = re.compile(r"<(final_)?ing_list>\s*:?", re.IGNORECASE)
+VEC_TAG = re.compile(r"<(final_)?ing_vec>\s*:?\s*(\[[^\]]*\])", re.IGNORECASE | re.DOTALL)
+NEXT_TAG = re.compile(r"</?\w+>")
+CATEGORY_LINE = re.compile(r"^\s*[-*]?\s*([^:\[\]]+?)\s*:\s*\[(.*?)\]\s*$", re.MULTILINE)
+FLAT_LIST = re.compile(r"\[(.*?)\]", re.DOTALL)
+
+def _split_items(body):
+    items = []
+    for raw in body.split(","):
+        item = raw.strip().strip("'\"").strip()
+        if item:
+            items.append(item)
+    return items
+
+def parse_llm_output(llm_output):
+    """
+    Pull the ingredient list and vector out of an LLM response.
+    Prefers <final_ing_list>/<final_ing_vec> over <ing_list>/<ing_vec>.
+    Returns {"categories": [(label, [items])], "items": [items], "vector_text": str or None}.
+    """
+    parsed = {"categories": [], "items": [], "vector_text": None}
+
+    list_matches = sorted(LIST_TAG.finditer(llm_output), key=lambda m: m.group(1) is None)
+    if list_matches:
+        start = list_matches[0].end()
+        next_tag = NEXT_TAG.search(llm_output, start)
+        section = llm_output[start:next_tag.start() if next_tag else len(llm_output)]
+
+        for label, body in CATEGORY_LINE.findall(section):
+            items = _split_items(body)
+            parsed["categories"].append((label.strip(), items))
+            parsed["items"].extend(items)
+        if not parsed["categories"]:
+            flat = FLAT_LIST.search(section)
+            if flat:
+                parsed["items"] = _split_items(flat.group(1))
+
+    vec_matches = sorted(VEC_TAG.finditer(llm_output), key=lambda m: m.group(1) is None)
+    if vec_matches:
+        parsed["vector_text"] = vec_matches[0].group(2)
+
+    return parsed
+
+class ValidationReport:
+    """
+    Outcome of a local check. status is one of:
+      "ok"        - list, categories and vector all agree with the master list
+      "corrected" - errors found and fixed deterministically
+      "escalate"  - needs the final_check LLM prompt (unknown names / nothing parsed)
+    """
+    def __init__(self, vector_length):
+        self.vector_length = vector_length
+        self.status = "ok"
+        self.errors = []
+        self.unknown_ingredients = []
+        self.corrections = []
+        self.final_categories = []
+        self.final_vector = IngredientVector(0, vector_length)
+
+    @property
+    def settled(self):
+        return self.status != "escalate"
+
+    def format(self):
+        """Render in the same shape as the final_check STRICT OUTPUT TEMPLATE."""
+        errors = self.errors or ["None"]
+        lines = [
+            "==================================================",
+            "FINAL INGREDIENTS DATA",
+            "==================================================",
+            "",
+            "<errors_found>:",
+        ]
+        lines += [f"- {error}" for error in errors]
+        lines += ["", "<final_ing_list>:"]
+        lines += [f"- {label}: [{', '.join(items)}]" for label, items in self.final_categories]
+        lines += [
+            "",
+            f"<final_ing_vec>: {self.final_vector.to_text()}",
+            "",
+            "==================================================",
+        ]
+        return "\n".join(lines)
+
+    def to_dict(self):
+        return {
+            "status": self.status,
+            "errors": self.errors,
+            "unknown_ingredients": self.unknown_ingredients,
+            "corrections": self.corrections,
+            "final_ing_list": {label: items for label, items in self.final_categories},
+            "final_ing_vec": self.final_vector.to_text(),
+        }
+
+class LocalValidator:
+    """
+    Deterministic replacement for the final_check LLM round-trip.
+    Re-derives the vector from the ingredient names with the same matcher
+    main.py uses, and re-groups the names by their master-list category.
+    """
+    def __init__(self, domain, categories, matcher=None):
+        self.domain = domain
+        self.categories = categories
+        self.vector_length = len(domain)
+        self.matcher = matcher or IngredientMatcher(domain)
+
+        # Category labels in CSV column order, plus a matcher for LLM-written labels
+        self.category_names = list(dict.fromkeys(categories))
+        self.category_matcher = IngredientMatcher(self.category_names)
+
+    def validate(self, llm_output, compact=False):
+        """
+        Check llm_output against the master list. Vector errors name the
+        0-based index i of the compact prompt's i:name entries when compact,
+        else the 1-based position in the column-wise list.
+        """
+        report = ValidationReport(self.vector_length)
+        parsed = parse_llm_output(llm_output)
+
+        if not parsed["items"]:
+            report.status = "escalate"
+            report.errors.append("No ingredient list found in the input")
+            return report
+
+        # 1. RESOLVE NAMES -> DOMAIN POSITIONS
+        indices = []
+        for item in parsed["items"]:
+            matched_name, idx = self.matcher.match(item)
+            if idx == -1:
+                report.unknown_ingredients.append(item)
+                continue
+            if matched_name.lower().strip() != item.lower().strip():
+                report.corrections.append(f"{item} -> {matched_name}")
+                report.errors.append(f"Ingredient name '{item}' corrected to '{matched_name}'")
+            if idx not in indices:
+                indices.append(idx)
+
+        if report.unknown_ingredients:
+            report.errors.append(f"Ingredients not in the Master List: {report.unknown_ingredients}")
+
+        # 2. CHECK CATEGORIZATION
+        for label, items in parsed["categories"]:
+            _, category_idx = self.category_matcher.match(label)
+            category = self.category_names[category_idx] if category_idx != -1 else None
+            for item in items:
+                matched_name, idx = self.matcher.match(item)
+                if idx != -1 and category is not None and self.categories[idx] != category:
+                    report.errors.append(
+                        f"'{matched_name}' is in {self.categories[idx]}, not {label}")
+
+        report.final_categories = [
+            (category, [self.domain[idx] for idx in indices if self.categories[idx] == category])
+            for category in self.category_names
+        ]
+
+        # 3. CHECK VECTOR
+        report.final_vector = IngredientVector.from_indices(indices, self.vector_length)
+        if parsed["vector_text"] is None:
+            report.errors.append("No ingredient vector found in the input")
+        else:
+            try:
+                llm_vector = IngredientVector.from_text(parsed["vector_text"])
+            except ValueError as e:
+                llm_vector = None
+                report.errors.append(f"Ingredient vector could not be parsed: {e}")
+            if llm_vector is not None and len(llm_vector) != self.vector_length:
+                report.errors.append(
+                    f"Vector length is {len(llm_vector)}, expected {self.vector_length}")
+            elif llm_vector is not None:
+                missing, extra = report.final_vector.diff(llm_vector)
+                for idx in missing:
+                    report.errors.append(f"{self._vector_slot(idx, compact)} ({self.domain[idx]}) should be 1")
+                for idx in extra:
+                    report.errors.append(f"{self._vector_slot(idx, compact)} ({self.domain[idx]}) should be 0")
+
+        if report.unknown_ingredients:
+            report.status = "escalate"
+        elif report.errors:
+            report.status = "corrected"
+        return report
+
+    def _vector_slot(self, idx, compact):
+        return f"Vector index {idx}" if compact else f"Vector position {idx + 1}"
@@ -1,101 +1,227 @@
-import jinja2
-import pandas as pd
 import json
-import difflib
-import math
+import csv
+import sys
+import argparse
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from ingredient_matcher import IngredientMatcher
+from ingredient_vector import IngredientVector
+from plan_registry import get_plan_resources
+from scaling_engine import parse_serving_size, scaled_sop
+from translation_cache import entry_id
+from prompt_compaction import compact_guidelines, order_proteins, prompt_size
+from instrumentation import get_metrics, logger, PrometheusFileSink, enable_metrics
+
+ORDER_FIELDS = [
+    "dish_title", "serving_size", "side_title", "carb_side_title",
+    "protein_choice", "carb_choice", "sauce_choice", "dressing_choice",
+    "customization_string", "translation_lang", "full_custom_request",
+]
+
+FALSE_STRINGS = ("false", "0", "no", "n", "off")
+ORDER_MODES = ("prefab", "custom_prefab", "full_custom")
+
+def order_flag(value, default):
+    """
+    Boolean order field from JSON (true/false) or a CSV cell ("true", "0",
+    "no", ...). Missing, empty and "None" cells give default, like the other fields.
+    """
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("", "none"):
+        return default
+    return text not in FALSE_STRINGS
+
+def order_mode(order):
+    """
+    The order's mode; missing or empty gives "prefab". Raises ValueError for
+    an unknown mode, which would otherwise render a prompt with no task.
+    """
+    mode = order.get("mode") or "prefab"
+    if mode not in ORDER_MODES:
+        raise ValueError(f"Unknown order mode {mode!r} (expected one of: {', '.join(ORDER_MODES)})")
+    return mode
+
+def order_to_kwargs(order):
+    """
+    Convert one order (same shape as recipe_config.json) into create_prompt kwargs.
+    """
+    mode = order_mode(order)
+    kwargs = {
+        "is_prefab": mode == "prefab",
+        "is_custom_prefab": mode == "custom_prefab",
+        "is_full_custom_request": mode == "full_custom",
+    }
+    for field in ORDER_FIELDS:
+        kwargs[field] = order.get(field)
+    kwargs["serving_size"] = order.get("serving_size") or "1"
+    kwargs["compact"] = order_flag(order.get("compact"), False)
+    kwargs["restrict_guidelines"] = order_flag(order.get("restrict_guidelines"), True)
+    return kwargs
+
+def load_orders(path):
+    """
+    Stream orders from a JSONL file (one recipe_config-style object per line)
+    or a CSV file with the same field names as columns. Empty CSV cells are None.
+    """
+    with open(path, "r", newline="") as f:
+        if path.lower().endswith(".csv"):
+            for row in csv.DictReader(f):
+                yield {k.strip(): (v if v != "" else None) for k, v in row.items()}
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
 
 class MacroChefGenerator:
-    def __init__(self, customer_plan="SUB"):
+    def __init__(self, customer_plan="SUB", base_dir="."):
         self.customer_plan = customer_plan
-        self.loader = jinja2.FileSystemLoader(searchpath="./")
-        self.env = jinja2.Environment(loader=self.loader)
-
-        # Load plan-specific template and ingredients
-        template_file = f"macrochef_prompt_{customer_plan}.jinja"
-        ingredients_file = f"ingredients_{customer_plan}.csv"
-
-        self.template = self.env.get_template(template_file)
-
-        # 1. LOAD CSV & CREATE MASTER DOMAIN
-        try:
-            self.df_ingredients = pd.read_csv(ingredients_file)
-            self.master_ingredients = self.df_ingredients.to_string(index=False)
-            
-            # Flatten CSV
-            raw_list = pd.melt(self.df_ingredients)['value'].dropna().unique().tolist()
-            self.master_ingredient_domain = [str(x).strip() for x in raw_list]
-            
-            self.df_singleserve = pd.read_csv("single_serve_guidelines_new.csv")
-            self.master_guidelines = self.df_singleserve.to_string(index=False)
-            
-        except Exception as e:
-            print(f"CRITICAL ERROR LOADING CSV: {e}")
-            self.master_ingredient_domain = []
-
-        # 2. LOAD JSON DBs
-        self.side_dish_db = self._load_json("side_dish_db.json")
-        self.recipe_bank = self._load_json("custom_recipe_bank.json")
-        self.carb_db = self._load_json("carb_db.json")
+        self.metrics = get_metrics()
+
+        # Plan data, DBs, matcher, vectors and templates are loaded once per
+        # process and shared (see plan_registry.py); reloaded if files change.
+        self.resources = get_plan_resources(customer_plan, base_dir)
+        self.env = self.resources.env
+        self.template = self.resources.macrochef_template
+
+        self.df_ingredients = self.resources.df_ingredients
+        self.df_singleserve = self.resources.df_singleserve
+        self.master_ingredients = self.resources.master_ingredients
+        self.master_ingredient_domain = self.resources.master_ingredient_domain
+        self.master_guidelines = self.resources.master_guidelines
+        self.matcher = self.resources.matcher
+        self.vector_cache = self.resources.vector_cache
+
+        self.side_dish_db = self.resources.side_dish_db
+        self.recipe_bank = self.resources.recipe_bank
+        self.carb_db = self.resources.carb_db
+        self.variant_index = self.resources.variant_index
+        self.scaling = self.resources.scaling
+        self.translations = self.resources.translations
         self.abstract = "MacroChef: A nutrition aware private chef service for gym goers and fitness enthusiasts. Main USP: Just pay us X rupees a month per person and forget about \n" \
         "counting/tracking your macros as well buying groceries forever. Just update your daily/weekly or monthly cuisine/macro/calorific preference in our seamless and user-friendly app\n" \
         " and let our 'smart chefs' take care of it for you. Our chefs carry the highest quality ingredients sourced specifically for you on that day and preapre tasty, healthy and personalised meals\n" \
         " fresh in your own kitchen. This the startup that I am working to set up."
 
-    def _load_json(self, filename):
-        try:
-            with open(filename, "r") as f: return json.load(f)
-        except: return {}
+        # Static per-plan header (abstract, master tables, vector constraints) rendered once
+        self.prompt_template = self.resources.prerendered_template(self.template.name, {
+            "abstract": self.abstract,
+            "master_ingredient_list": self.master_ingredients,
+            "master_single_serve_list": self.master_guidelines,
+            "vector_length": len(self.master_ingredient_domain),
+        })
+        # Compact-mode templates keyed by the guideline proteins kept (empty = all rows)
+        self._compact_templates = {}
+
+    def _compact_template(self, proteins):
+        """Prerendered template with the index:name domain and guideline lines for proteins (all rows if empty)."""
+        if proteins not in self._compact_templates:
+            self._compact_templates[proteins] = self.resources.prerendered_template(self.template.name, {
+                "abstract": self.abstract,
+                "master_ingredient_list": self.resources.compact_ingredients,
+                "master_single_serve_list": compact_guidelines(
+                    self.resources.guideline_columns, self.resources.guideline_rows, proteins),
+                "vector_length": len(self.master_ingredient_domain),
+                "compact": True,
+                "guideline_proteins": ", ".join(sorted(proteins)),
+            })
+        return self._compact_templates[proteins]
 
     def _smart_match_ingredient(self, input_ing, master_list):
-        input_clean = input_ing.lower().strip()
-        for idx, master_item in enumerate(master_list):
-            if master_item.lower().strip() == input_clean:
-                return master_item, idx
-
-        matches = difflib.get_close_matches(input_ing, master_list, n=1, cutoff=0.8)
-        if matches:
-            best_match = matches[0]
-            return best_match, master_list.index(best_match)
-
-        return None, -1
+        if master_list is self.master_ingredient_domain:
+            return self.matcher.match(input_ing)
+        return IngredientMatcher(master_list).match(input_ing)
+
+    def _build_vector(self, active_ingredients_list):
+        """
+        Match active ingredients against the domain.
+        Returns (IngredientVector, matched_log, unmatched_log).
+        """
+        indices = []
+        matched_log = []
+        unmatched_log = []
 
-    def _generate_binary_vector(self, active_ingredients_list):
+        with self.metrics.timer("stage", stage="match", plan=self.customer_plan):
+            for item in active_ingredients_list:
+                matched_name, idx = self._smart_match_ingredient(item, self.master_ingredient_domain)
+                if idx != -1:
+                    indices.append(idx)
+                    matched_log.append(f"{item} -> {matched_name}")
+                else:
+                    unmatched_log.append(item)
+
+        with self.metrics.timer("stage", stage="vectorize", plan=self.customer_plan):
+            vector = IngredientVector.from_indices(indices, len(self.master_ingredient_domain))
+        return vector, matched_log, unmatched_log
+
+    def _report_unmatched(self, unmatched_log, db_name=None, entry_key=None):
+        logger.warning("Could not find these ingredients in Master CSV: %s", unmatched_log, extra={
+            "event": "unmatched_ingredients", "plan": self.customer_plan,
+            "db": db_name, "entry": entry_key, "items": unmatched_log,
+        })
+        if self.metrics.enabled:
+            self.metrics.incr("unmatched_ingredients", len(unmatched_log), plan=self.customer_plan,
+                              db=db_name or "live", entry=entry_key or "")
+
+    def _generate_binary_vector(self, active_ingredients_list, db_name=None, entry_key=None):
         master_len = len(self.master_ingredient_domain)
         if master_len == 0: return "[]"
-            
-        binary_vec = [0] * master_len
-        matched_log = []
-        unmatched_log = []
 
-        for item in active_ingredients_list:
-            matched_name, idx = self._smart_match_ingredient(item, self.master_ingredient_domain)
-            if idx != -1:
-                binary_vec[idx] = 1
-                matched_log.append(f"{item} -> {matched_name}")
-            else:
-                unmatched_log.append(item)
+        vector, matched_log, unmatched_log = self._build_vector(active_ingredients_list)
 
-        current_len = len(binary_vec)
+        current_len = len(vector)
         if current_len != master_len:
-            print(f"CRITICAL ERROR: Vector Length Mismatch! Master: {master_len}, Generated: {current_len}")
+            logger.critical("Vector Length Mismatch! Master: %s, Generated: %s", master_len, current_len,
+                            extra={"event": "vector_length_mismatch", "plan": self.customer_plan})
 
         if unmatched_log:
-            print(f" WARNING: Could not find these ingredients in Master CSV: {unmatched_log}")
-
-        return str(binary_vec)
+            self._report_unmatched(unmatched_log, db_name, entry_key)
+
+        return vector.to_text()
+
+    def _db_ingredients_vector(self, db_name, entry_key, serving_key, active_ingredients_list):
+        """
+        Vector for a static DB entry: precomputed lookup, falling back to live matching.
+        """
+        cached = self.vector_cache.lookup(db_name, entry_key, serving_key)
+        if self.metrics.enabled:
+            self.metrics.incr("vector_cache_lookups", plan=self.customer_plan, db=db_name,
+                              result="miss" if cached is None else "hit")
+        if cached is None or not self.master_ingredient_domain:
+            return self._generate_binary_vector(active_ingredients_list, db_name, entry_key)
+
+        vector, unmatched_log = cached
+        if unmatched_log:
+            self._report_unmatched(unmatched_log, db_name, entry_key)
+        return vector
+
+    def _translated_sop(self, db_name, entry_key, serving_key, sop, lang):
+        """Cached translation of a static DB SOP, or None (left for the LLM to translate)."""
+        if not lang:
+            return None
+        return self.translations.get(entry_id(db_name, entry_key, serving_key), lang, sop)
+
+    def _side_dish_sop(self, side_title, side, serving_size, lang):
+        """(sop, pretranslated) for a side dish; a cached translation is scaled the same way as the English SOP."""
+        translated = self._translated_sop("side_dish_db", side_title, side["source_key"], side["source_sop"], lang)
+        if translated is None:
+            return side["sop"], False
+        return scaled_sop(translated, parse_serving_size(serving_size), side["source_key"], side["factor"]), True
+
+    def create_prompt(self, is_prefab=False, is_custom_prefab=False, is_customization=False, is_full_custom_request=False,
+                      compact=False, restrict_guidelines=True, **kwargs):
+        """
+        Render the prompt for one order. compact=True embeds the domain as
+        index:name pairs and the guidelines as one line per row; with
+        restrict_guidelines, protein rows the order does not mention are
+        dropped (all are kept when it mentions none).
+        """
 
-    def _get_side_lookup_key(self, serving_size_str):
-        try:
-            val = float(serving_size_str)
-            floored_val = math.floor(val)
-            if floored_val < 1: floored_val = 1
-            return str(floored_val)
-        except (ValueError, TypeError):
-            return "1"
-
-    def create_prompt(self, is_prefab=False, is_custom_prefab=False, is_customization=False, is_full_custom_request=False, **kwargs):
-        
         vec_len = len(self.master_ingredient_domain)
+        translation_lang = kwargs.get("translation_lang", None)
         
         # Default Context
         context = {
@@ -107,10 +233,15 @@ class MacroChefGenerator:
             "is_custom_prefab": is_custom_prefab,
             "is_full_custom_request": is_full_custom_request,
             "customization_string": kwargs.get("customization_string", "None"),
-            "translation_lang": kwargs.get("translation_lang", None),
+            "translation_lang": translation_lang,
+            "compact": bool(compact),
             # Default these to False/Empty to prevent leaking into wrong branches
             "is_side": False,
-            "is_carbside": False 
+            "is_carbside": False,
+            # Static SOPs substituted with a cached translation (see translation_cache.py)
+            "side_dish_sop_translated": False,
+            "carb_side_instructions_translated": False,
+            "imported_recipe_sop_translated": False,
         }
 
         # --- BRANCH 1: PRE-FAB (Generative) ---
@@ -125,14 +256,14 @@ class MacroChefGenerator:
             
             if side_title and str(side_title).lower() != "none" and str(side_title).strip() != "":
                 context["is_side"] = True
-                side_db_key = self._get_side_lookup_key(raw_serving_size)
-                dish_data = self.side_dish_db.get(side_title)
+                side = self.scaling.side_dish(side_title, raw_serving_size)
                 
-                if dish_data and side_db_key in dish_data:
-                    context["side_dish_sop"] = dish_data[side_db_key]["sop"]
-                    active_list = dish_data[side_db_key].get("active_ingredients", [])
+                if side:
+                    context["side_dish_sop"], context["side_dish_sop_translated"] = self._side_dish_sop(
+                        side_title, side, raw_serving_size, translation_lang)
+                    active_list = side["active_ingredients"]
                     context["side_ingredients_list"] = str(active_list)
-                    context["side_ingredients_vector"] = self._generate_binary_vector(active_list)
+                    context["side_ingredients_vector"] = self._db_ingredients_vector("side_dish_db", side_title, side["source_key"], active_list)
                 else:
                     context["side_dish_sop"] = "Standard Prep"
                     context["side_ingredients_list"] = "[]"
@@ -147,9 +278,13 @@ class MacroChefGenerator:
                 carb_data = self.carb_db.get(carb_title)
                 if carb_data:
                     context["carb_side_instructions"] = carb_data.get("sop", "Standard Prep")
+                    translated = self._translated_sop("carb_db", carb_title, "", context["carb_side_instructions"], translation_lang)
+                    if translated is not None:
+                        context["carb_side_instructions"] = translated
+                        context["carb_side_instructions_translated"] = True
                     carb_list = carb_data.get("active_ingredients", [])
                     context["carb_ingredients_list"] = str(carb_list)
-                    context["carb_ingredients_vector"] = self._generate_binary_vector(carb_list)
+                    context["carb_ingredients_vector"] = self._db_ingredients_vector("carb_db", carb_title, "", carb_list)
                 else:
                     context["carb_side_instructions"] = "Standard Boil"
                     context["carb_ingredients_list"] = "[]"
@@ -170,22 +305,25 @@ class MacroChefGenerator:
             # We pass carb_choice just for display in the Dish Title if needed, 
             # BUT we do NOT trigger is_carbside logic.
             
-            # A. KEY CONSTRUCTION
-            lookup_key = base_title 
-            if "Salad" in base_title:
-                lookup_key = f"{base_title} ({protein_choice}, {dressing_choice})"
-            elif "Chinese" in base_title:
-                lookup_key = f"{base_title} ({protein_choice}, {carb_choice})"
-            elif "Sandwich" in base_title:
-                lookup_key = f"{base_title} ({protein_choice}, {sauce_choice})"
-                
+            # A. VARIANT RESOLUTION (O(1) via the prebuilt variant index)
+            lookup_key, variant_problems = self.variant_index.resolve(
+                base_title, protein_choice, carb_choice, sauce_choice, dressing_choice)
+            if variant_problems:
+                logger.warning("Variant '%s' is not in the recipe bank: %s", lookup_key, variant_problems,
+                               extra={"event": "variant_not_found", "plan": self.customer_plan, "entry": lookup_key})
+                self.metrics.incr("variant_not_found", plan=self.customer_plan)
+
             # B. MAIN DISH LOOKUP (Carb ingredients are included here!)
             recipe_data = self.recipe_bank.get(lookup_key)
             if recipe_data and "1" in recipe_data:
                 context["imported_recipe_sop"] = recipe_data["1"]["sop"]
+                translated = self._translated_sop("recipe_bank", lookup_key, "1", context["imported_recipe_sop"], translation_lang)
+                if translated is not None:
+                    context["imported_recipe_sop"] = translated
+                    context["imported_recipe_sop_translated"] = True
                 main_active_list = recipe_data["1"].get("active_ingredients", [])
                 context["main_ingredients_list"] = str(main_active_list)
-                context["main_ingredients_vector"] = self._generate_binary_vector(main_active_list)
+                context["main_ingredients_vector"] = self._db_ingredients_vector("recipe_bank", lookup_key, "1", main_active_list)
             else:
                 context["imported_recipe_sop"] = f"CRITICAL: Variant '{lookup_key}' not found."
                 context["main_ingredients_list"] = "[]"
@@ -196,14 +334,14 @@ class MacroChefGenerator:
             if side_title and str(side_title).lower() != "none" and str(side_title).strip() != "":
                 context["is_side"] = True
                 context["side_title"] = side_title
-                side_db_key = self._get_side_lookup_key(raw_serving_size)
-                side_data = self.side_dish_db.get(side_title)
+                side = self.scaling.side_dish(side_title, raw_serving_size)
                 
-                if side_data and side_db_key in side_data:
-                    context["side_dish_sop"] = side_data[side_db_key]["sop"]
-                    side_active_list = side_data[side_db_key].get("active_ingredients", [])
+                if side:
+                    context["side_dish_sop"], context["side_dish_sop_translated"] = self._side_dish_sop(
+                        side_title, side, raw_serving_size, translation_lang)
+                    side_active_list = side["active_ingredients"]
                     context["side_ingredients_list"] = str(side_active_list)
-                    context["side_ingredients_vector"] = self._generate_binary_vector(side_active_list)
+                    context["side_ingredients_vector"] = self._db_ingredients_vector("side_dish_db", side_title, side["source_key"], side_active_list)
                 else:
                     context["side_dish_sop"] = "Standard Preparation"
                     context["side_ingredients_list"] = "[]"
@@ -213,42 +351,155 @@ class MacroChefGenerator:
         elif is_full_custom_request:
             context["full_custom_request"] = kwargs.get("full_custom_request", "")
 
-        return self.template.render(context)
+        template = self.prompt_template
+        if compact:
+            proteins = frozenset()
+            if restrict_guidelines:
+                proteins = order_proteins([
+                    kwargs.get("dish_title"), kwargs.get("protein_choice"), kwargs.get("side_title"),
+                    kwargs.get("carb_side_title"), kwargs.get("full_custom_request"), kwargs.get("customization_string"),
+                    context.get("main_ingredients_list"), context.get("side_ingredients_list"),
+                ])
+            template = self._compact_template(proteins)
+
+        if not self.metrics.enabled:
+            return template.render(context)
+        with self.metrics.timer("stage", stage="render", plan=self.customer_plan, generator="macrochef"):
+            prompt = template.render(context)
+        self.metrics.incr("prompt_chars", len(prompt), plan=self.customer_plan, compact=bool(compact))
+        return prompt
+
+    def create_prompts(self, orders):
+        """
+        Render many orders with this generator's loaded data and template.
+        Yields prompts lazily, in input order.
+        """
+        for order in orders:
+            yield self.create_prompt(**order_to_kwargs(order))
+
+# Per-process generator cache: one warm generator per plan, shared by every
+# order this process renders (the main process in serial mode, each pool worker otherwise).
+_plan_generators = {}
+
+def _get_plan_generator(plan):
+    if plan not in _plan_generators:
+        _plan_generators[plan] = MacroChefGenerator(customer_plan=plan)
+    return _plan_generators[plan]
+
+def _init_render_worker(plans):
+    """
+    Warm each plan's generator. A plan that fails to load is left to fail
+    again on its own orders, where the error is recorded per order; raising
+    here would break the whole pool.
+    """
+    for plan in plans:
+        try:
+            _get_plan_generator(plan)
+        except Exception as e:
+            logger.warning("Could not preload plan %s in render worker: %s", plan, e,
+                           extra={"event": "worker_plan_error", "plan": plan, "error": str(e)})
+
+def _render_order_record(indexed_order):
+    """
+    Render one (index, order) pair into an output record.
+    Errors are captured on the record instead of aborting the batch.
+    """
+    index, order = indexed_order
+    plan = order.get("customer_plan") or "SUB"
+    record = {
+        "index": index,
+        "order_id": order.get("order_id"),
+        "customer_plan": plan,
+        "mode": order.get("mode") or "prefab",
+        "prompt": None,
+        "prompt_size": None,
+        "error": None,
+    }
+    try:
+        record["prompt"] = _get_plan_generator(plan).create_prompt(**order_to_kwargs(order))
+        record["prompt_size"] = prompt_size(record["prompt"])
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+        record["traceback"] = traceback.format_exc()
+    return record
+
+def render_orders_parallel(orders, workers=None, plans=("SUB", "DEMO"), chunksize=16):
+    """
+    Render orders across a pool of worker processes. Each worker builds its
+    plan generators once at startup; a plan that fails to load only fails
+    the orders that use it. Records are yielded in input order.
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_render_worker, initargs=(tuple(plans),)) as pool:
+        yield from pool.map(_render_order_record, enumerate(orders), chunksize=chunksize)
+
+def render_order_sheet(orders_path, output_path, workers=0, compact=False, restrict_guidelines=True):
+    """
+    Batch mode: render every order in orders_path and stream JSONL records to output_path.
+    workers=0 renders in this process; workers>0 spreads orders over a process pool.
+    compact/restrict_guidelines are defaults for orders that do not set those fields themselves.
+    Returns (rendered, failed) counts.
+    """
+    orders = load_orders(orders_path)
+    if compact:
+        orders = ({**order, "compact": order_flag(order.get("compact"), True),
+                   "restrict_guidelines": order_flag(order.get("restrict_guidelines"), restrict_guidelines)}
+                  for order in orders)
+    if workers:
+        records = render_orders_parallel(orders, workers=workers)
+    else:
+        records = map(_render_order_record, enumerate(orders))
+
+    rendered = failed = 0
+    with open(output_path, "w") as out:
+        for record in records:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            if record["error"]:
+                failed += 1
+            else:
+                rendered += 1
+    return rendered, failed
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate MacroChef LLM prompts.")
+    parser.add_argument("--orders", help="Batch mode: JSONL or CSV order sheet to render")
+    parser.add_argument("--output", default="prompts.jsonl", help="Batch mode output JSONL (default: prompts.jsonl)")
+    parser.add_argument("--workers", type=int, default=0, help="Batch mode: worker processes (0 = render in this process)")
+    parser.add_argument("--compact", action="store_true", help="Compact prompts: index:name domain, guideline rows for the order's proteins only")
+    parser.add_argument("--all-guidelines", action="store_true", help="With --compact, keep every guideline row")
+    parser.add_argument("--size-report", action="store_true", help="Print the rendered prompt's size (chars, bytes, approx. tokens) to stderr")
+    parser.add_argument("--metrics-file", help="Write stage timings and counters here in Prometheus text format (in-process rendering only)")
+    args = parser.parse_args()
+
+    if args.metrics_file:
+        enable_metrics(PrometheusFileSink(args.metrics_file))
+
+    if args.orders:
+        rendered, failed = render_order_sheet(args.orders, args.output, workers=args.workers,
+                                              compact=args.compact, restrict_guidelines=not args.all_guidelines)
+        get_metrics().flush()
+        print(f"Rendered {rendered} prompts to {args.output} ({failed} failed)", file=sys.stderr)
+        exit(1 if failed else 0)
+
     # Load config from recipe_config.json
     try:
         with open("recipe_config.json", "r") as f:
             config = json.load(f)
     except FileNotFoundError:
-        print("ERROR: recipe_config.json not found.")
-        print("Run 'python recipe_config.py' first to generate the config file.")
+        logger.error("recipe_config.json not found. Run 'python recipe_config.py' first to generate the config file.")
         exit(1)
 
-    # Determine mode and plan
-    mode = config.get("mode", "prefab")
-    is_prefab = mode == "prefab"
-    is_custom_prefab = mode == "custom_prefab"
-    is_full_custom_request = mode == "full_custom"
-
+    # Determine plan; mode is resolved from the config by order_to_kwargs
     customer_plan = config.get("customer_plan", "SUB")
     generator = MacroChefGenerator(customer_plan=customer_plan)
-    print(generator.create_prompt(
-        is_prefab=is_prefab,
-        is_custom_prefab=is_custom_prefab,
-        is_full_custom_request=is_full_custom_request,
-        dish_title=config.get("dish_title"),
-        serving_size=config.get("serving_size", "1"),
-        side_title=config.get("side_title"),
-        carb_side_title=config.get("carb_side_title"),
-        protein_choice=config.get("protein_choice"),
-        carb_choice=config.get("carb_choice"),
-        sauce_choice=config.get("sauce_choice"),
-        dressing_choice=config.get("dressing_choice"),
-        customization_string=config.get("customization_string"),
-        translation_lang=config.get("translation_lang"),
-        full_custom_request=config.get("full_custom_request"),
-    ))
+    kwargs = order_to_kwargs(config)
+    if args.compact:
+        kwargs["compact"] = True
+        kwargs["restrict_guidelines"] = not args.all_guidelines
+    prompt = generator.create_prompt(**kwargs)
+    print(prompt)
+    if args.size_report:
+        print(json.dumps({"customer_plan": customer_plan, "compact": kwargs["compact"], **prompt_size(prompt)}), file=sys.stderr)
+    get_metrics().flush()
 
 
     
@@ -0,0 +1,223 @@
+import os
+import threading
+from csv_tables import read_table, melt_unique
+from ingredient_matcher import IngredientMatcher
+from local_validator import LocalValidator
+from vector_cache import VectorCache, CACHE_DIR, fingerprint_files, stat_fingerprint
+from variant_index import VariantIndex
+from scaling_engine import ScalingEngine
+from recipe_store import load_json_db, open_store
+from template_pipeline import create_environment, PrerenderedTemplate
+from instrumentation import get_metrics, logger
+from data_compiler import load_resolved_index
+from translation_cache import TranslationCache, TRANSLATIONS_FILE
+from prompt_compaction import compact_domain
+
+GUIDELINES_FILE = "single_serve_guidelines_new.csv"
+# "csv" (default, no pandas import) or "pandas" for the original DataFrame path
+CSV_BACKEND = os.environ.get("MACROCHEF_CSV_BACKEND", "csv")
+# "json" loads the DBs whole; "jsonl" opens lazily decoded stores under .macrochef_cache/db
+DB_BACKEND = os.environ.get("MACROCHEF_DB_BACKEND", "json")
+DB_FILES = {
+    "side_dish_db": "side_dish_db.json",
+    "recipe_bank": "custom_recipe_bank.json",
+    "carb_db": "carb_db.json",
+}
+
+def plan_files(customer_plan):
+    """Every data/template file a plan's resources are built from."""
+    return [
+        f"ingredients_{customer_plan}.csv",
+        GUIDELINES_FILE,
+        *DB_FILES.values(),
+        f"macrochef_prompt_{customer_plan}.jinja",
+        f"final_check_prompt_{customer_plan}.jinja",
+        TRANSLATIONS_FILE,
+    ]
+
+def _load_db(path, base_dir):
+    if DB_BACKEND == "jsonl":
+        return open_store(path, store_dir=os.path.join(base_dir, CACHE_DIR, "db"))
+    return load_json_db(path)
+
+class PlanResources:
+    """
+    Everything a plan needs that does not change between orders: the
+    ingredient table and domain, guideline table, JSON DBs, matcher,
+    precomputed vectors and compiled templates. Built once per process
+    by get_plan_resources() and shared by both generators.
+    """
+    def __init__(self, customer_plan, base_dir, env, fingerprint):
+        self.customer_plan = customer_plan
+        self.base_dir = base_dir
+        self.env = env
+        self.fingerprint = fingerprint
+        ingredients_file = os.path.join(base_dir, f"ingredients_{customer_plan}.csv")
+        metrics = get_metrics()
+
+        # 1. LOAD CSV & CREATE MASTER DOMAIN
+        self.df_ingredients = None
+        self.df_singleserve = None
+        self.master_guidelines = ""
+        self.guideline_columns = []
+        self.guideline_rows = []
+        try:
+            with metrics.timer("stage", stage="load_csv", plan=customer_plan):
+                if CSV_BACKEND == "pandas":
+                    self._load_tables_pandas(ingredients_file)
+                else:
+                    self._load_tables_csv(ingredients_file)
+        except Exception as e:
+            logger.critical("Error loading CSV for plan %s: %s", customer_plan, e,
+                            extra={"event": "csv_load_error", "plan": customer_plan, "error": str(e)})
+            self.master_ingredients = ""
+            self.master_ingredient_domain = []
+            self.ingredient_categories = []
+        # index:name encoding of the domain for compact prompts
+        self.compact_ingredients = compact_domain(self.master_ingredient_domain, self.ingredient_categories)
+
+        # 2. LOAD JSON DBs
+        with metrics.timer("stage", stage="load_db", plan=customer_plan):
+            self.side_dish_db = _load_db(os.path.join(base_dir, DB_FILES["side_dish_db"]), base_dir)
+            self.recipe_bank = _load_db(os.path.join(base_dir, DB_FILES["recipe_bank"]), base_dir)
+            self.carb_db = _load_db(os.path.join(base_dir, DB_FILES["carb_db"]), base_dir)
+
+            self.variant_index = VariantIndex(self.recipe_bank)
+            self.scaling = ScalingEngine(self.side_dish_db, self.carb_db, self.guideline_rows)
+            self.translations = TranslationCache(os.path.join(base_dir, TRANSLATIONS_FILE))
+
+        # 3. MATCHER, VALIDATOR & PRECOMPUTED VECTORS
+        with metrics.timer("stage", stage="load_vectors", plan=customer_plan):
+            self.matcher = IngredientMatcher(self.master_ingredient_domain)
+            # Names compiled offline by data_compiler.py never hit live matching
+            resolved = load_resolved_index(base_dir, customer_plan, self.master_ingredient_domain)
+            self.resolved_index_loaded = resolved is not None
+            if resolved:
+                self.matcher.preseed(resolved)
+            self.validator = LocalValidator(self.master_ingredient_domain, self.ingredient_categories, self.matcher)
+            self.vector_cache = VectorCache(
+                customer_plan,
+                self.matcher,
+                {"side_dish_db": self.side_dish_db, "carb_db": self.carb_db, "recipe_bank": self.recipe_bank},
+                [ingredients_file] + [os.path.join(base_dir, name) for name in DB_FILES.values()],
+                cache_dir=os.path.join(base_dir, CACHE_DIR),
+            )
+        metrics.add_collector(("matcher", base_dir, customer_plan), self._matcher_gauges)
+        metrics.add_collector(("translations", base_dir, customer_plan), self._translation_gauges)
+
+        # Prerendered templates keyed by (template name, static context)
+        self._prerendered = {}
+        self._content_fingerprint = None
+
+    def _load_tables_csv(self, ingredients_file):
+        self.df_ingredients = read_table(ingredients_file)
+        self.master_ingredients = self.df_ingredients.to_string(index=False)
+
+        # Flatten CSV column-wise, keeping each item's category column
+        flattened = melt_unique(self.df_ingredients)
+        self.master_ingredient_domain = [str(value).strip() for value, _ in flattened]
+        self.ingredient_categories = [str(column).strip() for _, column in flattened]
+
+        self.df_singleserve = read_table(os.path.join(self.base_dir, GUIDELINES_FILE))
+        self.master_guidelines = self.df_singleserve.to_string(index=False)
+        self.guideline_columns = list(self.df_singleserve.columns)
+        self.guideline_rows = list(zip(*self.df_singleserve.data))
+
+    def _load_tables_pandas(self, ingredients_file):
+        import pandas as pd
+
+        self.df_ingredients = pd.read_csv(ingredients_file)
+        self.master_ingredients = self.df_ingredients.to_string(index=False)
+
+        melted = pd.melt(self.df_ingredients).dropna(subset=["value"]).drop_duplicates(subset=["value"])
+        self.master_ingredient_domain = [str(x).strip() for x in melted["value"]]
+        self.ingredient_categories = [str(x).strip() for x in melted["variable"]]
+
+        self.df_singleserve = pd.read_csv(os.path.join(self.base_dir, GUIDELINES_FILE))
+        self.master_guidelines = self.df_singleserve.to_string(index=False)
+        self.guideline_columns = list(self.df_singleserve.columns)
+        self.guideline_rows = list(self.df_singleserve.itertuples(index=False, name=None))
+
+    def _matcher_gauges(self):
+        labels = {"plan": self.customer_plan}
+        lookups = self.matcher.fuzzy_lookups
+        return [
+            ("matcher_memo_entries", labels, len(self.matcher.memo)),
+            ("matcher_fuzzy_lookups", labels, lookups),
+            ("matcher_fuzzy_hits", labels, self.matcher.fuzzy_hits),
+            ("matcher_fuzzy_hit_rate", labels, round(self.matcher.fuzzy_hits / lookups, 4) if lookups else 0.0),
+        ]
+
+    def _translation_gauges(self):
+        labels = {"plan": self.customer_plan}
+        return [
+            ("translation_cache_entries", labels, len(self.translations)),
+            ("translation_cache_hits", labels, self.translations.hits),
+            ("translation_cache_misses", labels, self.translations.misses),
+        ]
+
+    @property
+    def macrochef_template(self):
+        return self.env.get_template(f"macrochef_prompt_{self.customer_plan}.jinja")
+
+    @property
+    def final_check_template(self):
+        return self.env.get_template(f"final_check_prompt_{self.customer_plan}.jinja")
+
+    @property
+    def content_fingerprint(self):
+        """sha256 over the contents of every file this plan is built from (computed once)."""
+        if self._content_fingerprint is None:
+            self._content_fingerprint = fingerprint_files(
+                [os.path.join(self.base_dir, name) for name in plan_files(self.customer_plan)])
+        return self._content_fingerprint
+
+    def prerendered_template(self, template_name, static_context):
+        """PrerenderedTemplate for this plan, built once per distinct static context."""
+        key = (template_name, tuple(sorted(static_context.items())))
+        if key not in self._prerendered:
+            self._prerendered[key] = PrerenderedTemplate(self.env, template_name, static_context)
+        return self._prerendered[key]
+
+_registry = {}
+_environments = {}
+_registry_lock = threading.Lock()
+
+def get_environment(base_dir="."):
+    """One jinja2.Environment per data directory, so compiled templates are shared (and bytecode-cached on disk)."""
+    base_dir = os.path.abspath(base_dir)
+    with _registry_lock:
+        if base_dir not in _environments:
+            _environments[base_dir] = create_environment(base_dir, os.path.join(base_dir, CACHE_DIR, "jinja"))
+        return _environments[base_dir]
+
+def get_plan_resources(customer_plan="SUB", base_dir="."):
+    """
+    Return the cached PlanResources for a plan, rebuilding them only when one
+    of the plan's files has changed (by mtime/size) since they were loaded.
+    """
+    base_dir = os.path.abspath(base_dir)
+    fingerprint = stat_fingerprint([os.path.join(base_dir, name) for name in plan_files(customer_plan)])
+    key = (base_dir, customer_plan)
+
+    resources = _registry.get(key)
+    if resources is not None and resources.fingerprint == fingerprint:
+        return resources
+
+    env = get_environment(base_dir)
+    with _registry_lock:
+        resources = _registry.get(key)
+        if resources is None or resources.fingerprint != fingerprint:
+            get_metrics().incr("plan_loads", plan=customer_plan, reason="reload" if resources else "initial")
+            if resources is not None:
+                logger.info("Reloading plan %s: source files changed", customer_plan,
+                            extra={"event": "plan_reload", "plan": customer_plan})
+            with get_metrics().timer("stage", stage="load", plan=customer_plan):
+                resources = PlanResources(customer_plan, base_dir, env, fingerprint)
+            _registry[key] = resources
+        return resources
+
+def clear_registry():
+    with _registry_lock:
+        _registry.clear()
+        _environments.clear()
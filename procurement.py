@@ -0,0 +1,288 @@
+"""
+Procurement rollup: total a day's order sheet into per-chef and per-zone
+shopping lists over each plan's ingredient domain.
+
+    python procurement.py --orders orders.jsonl --output shopping
+"""
+
+import argparse
+import csv
+import json
+from main import load_orders, order_mode
+from plan_registry import get_plan_resources
+from scaling_engine import QUANTITY, parse_amount, parse_serving_size
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+GROUP_FIELDS = ("chef", "zone")
+UNASSIGNED = "unassigned"
+ROW_FIELDS = ["customer_plan", "group", "ingredient", "dishes", "servings", "quantity", "unit"]
+# Rows of the {prefix}_issues file: components without data and amounts left out of a total
+ISSUE_FIELDS = ["kind", "group_by", "customer_plan", "group", "ingredient", "quantity", "unit", "detail"]
+
+# Canonical unit and multiplier for quantities read from guideline portions
+UNIT_ALIASES = {
+    "g": ("g", 1), "gm": ("g", 1), "gms": ("g", 1), "gram": ("g", 1), "grams": ("g", 1),
+    "kg": ("g", 1000), "ml": ("ml", 1), "l": ("ml", 1000), "litre": ("ml", 1000), "litres": ("ml", 1000),
+}
+
+def _present(value):
+    return value is not None and str(value).strip() != "" and str(value).lower() != "none"
+
+def parse_portion(text):
+    """
+    (amount, unit) for one serving of a guideline portion such as "50 gm (dry)"
+    or " 2 nos roti (50 gm raw atta )". Weights/volumes win over counts and the
+    upper end of a range is used. None if the text has no quantity.
+    """
+    matches = list(QUANTITY.finditer(text))
+    if not matches:
+        return None
+    measured = [m for m in matches if m.group("unit").lower() in UNIT_ALIASES]
+    match = (measured or matches)[0]
+    amount = parse_amount(match.group("high") or match.group("low"))
+    unit = match.group("unit").lower()
+    if unit in UNIT_ALIASES:
+        unit, multiplier = UNIT_ALIASES[unit]
+        return amount * multiplier, unit
+    return amount, unit.rstrip("s") or unit
+
+class ProcurementRollup:
+    """
+    Accumulates orders, then sums ingredient usage per plan and group.
+
+    Every resolvable component of an order (side dish, carb side, custom
+    recipe) contributes its cached IngredientVector weighted by the order's
+    serving size; the sums run as one matrix product per plan when numpy is
+    installed. Protein choices and carb bases also get a quantity from the
+    single-serve guidelines, scaled by servings. Components with no data
+    (generative pre-fab mains, full custom requests) are listed in unresolved.
+    """
+    def __init__(self, base_dir=".", group_fields=GROUP_FIELDS):
+        self.base_dir = base_dir
+        self.group_fields = tuple(group_fields)
+        # plan -> list of (IngredientVector, servings, {group_field: value})
+        self.components = {}
+        # plan -> list of (domain index, amount, unit, {group_field: value})
+        self.quantities = {}
+        self.unresolved = []
+        self.order_count = 0
+
+    def _resources(self, plan):
+        return get_plan_resources(plan, self.base_dir)
+
+    def _add_component(self, plan, resources, db_name, entry_key, serving_key, servings, groups, label):
+        cached = resources.vector_cache.vector(db_name, entry_key, serving_key)
+        if cached is None:
+            self.unresolved.append(label)
+            return
+        vector, _ = cached
+        self.components.setdefault(plan, []).append((vector, servings, groups))
+
+    def _add_quantity(self, plan, resources, ingredient, servings, groups):
+        portion = resources.scaling.portion(ingredient, 1)
+        if portion is None or not portion["scalable"]:
+            return
+        parsed = parse_portion(portion["portion"])
+        _, idx = resources.matcher.match(ingredient)
+        if parsed is None or idx == -1:
+            return
+        amount, unit = parsed
+        self.quantities.setdefault(plan, []).append((idx, amount * servings, unit, groups))
+
+    def add_order(self, order):
+        plan = order.get("customer_plan") or "SUB"
+        resources = self._resources(plan)
+        servings = parse_serving_size(order.get("serving_size") or "1")
+        groups = {field: str(order.get(field) or UNASSIGNED) for field in self.group_fields}
+        order_label = order.get("order_id") or f"#{self.order_count}"
+        self.order_count += 1
+        try:
+            mode = order_mode(order)
+        except ValueError as e:
+            self.unresolved.append(f"{order_label}: {e}")
+            return
+
+        if mode == "full_custom":
+            self.unresolved.append(f"{order_label}: full custom request")
+            return
+
+        side_title = order.get("side_title")
+        if _present(side_title):
+            side = resources.scaling.side_dish(side_title, servings)
+            if side is None:
+                self.unresolved.append(f"{order_label}: side dish '{side_title}'")
+            else:
+                self._add_component(plan, resources, "side_dish_db", side_title, side["source_key"],
+                                    servings, groups, f"{order_label}: side dish '{side_title}'")
+
+        if mode == "custom_prefab":
+            lookup_key, problems = resources.variant_index.resolve(
+                order.get("dish_title"), order.get("protein_choice"), order.get("carb_choice"),
+                order.get("sauce_choice"), order.get("dressing_choice"))
+            if problems or lookup_key not in resources.recipe_bank:
+                self.unresolved.append(f"{order_label}: recipe '{lookup_key}'")
+            else:
+                self._add_component(plan, resources, "recipe_bank", lookup_key, "1",
+                                    servings, groups, f"{order_label}: recipe '{lookup_key}'")
+            if _present(order.get("protein_choice")):
+                self._add_quantity(plan, resources, order["protein_choice"], servings, groups)
+            return
+
+        self.unresolved.append(f"{order_label}: pre-fab dish '{order.get('dish_title')}' (generated, no recipe data)")
+        carb_title = order.get("carb_side_title")
+        if _present(carb_title):
+            carb = resources.scaling.carb(carb_title, servings)
+            if carb is None:
+                self.unresolved.append(f"{order_label}: carb side '{carb_title}'")
+                return
+            self._add_component(plan, resources, "carb_db", carb_title, "", servings, groups,
+                                f"{order_label}: carb side '{carb_title}'")
+            if carb["active_ingredients"]:
+                self._add_quantity(plan, resources, carb["active_ingredients"][0], servings, groups)
+
+    def add_orders(self, orders):
+        for order in orders:
+            self.add_order(order)
+        return self
+
+    def _sum_vectors(self, plan, group_field):
+        """{group: (dish counts, serving totals)} as per-domain-index lists."""
+        length = len(self._resources(plan).master_ingredient_domain)
+        # A batch only has a few distinct component vectors: collapse to
+        # (group, vector) -> [dishes, servings] before summing over the domain
+        collapsed = {}
+        for vector, servings, groups in self.components.get(plan, []):
+            totals = collapsed.setdefault((groups[group_field], vector), [0, 0.0])
+            totals[0] += 1
+            totals[1] += servings
+        labels = sorted({label for label, _ in collapsed})
+
+        if np is not None and collapsed:
+            vectors = list({vector: None for _, vector in collapsed})
+            row = {vector: i for i, vector in enumerate(vectors)}
+            position = {label: i for i, label in enumerate(labels)}
+            matrix = np.vstack([vector.to_numpy() for vector in vectors]).astype(np.float64)
+            dish_weights = np.zeros((len(labels), len(vectors)))
+            serving_weights = np.zeros((len(labels), len(vectors)))
+            for (label, vector), (dishes, servings) in collapsed.items():
+                dish_weights[position[label], row[vector]] = dishes
+                serving_weights[position[label], row[vector]] = servings
+            dishes = dish_weights @ matrix
+            servings = serving_weights @ matrix
+            return {label: (dishes[i].tolist(), servings[i].tolist()) for label, i in position.items()}
+
+        result = {label: ([0.0] * length, [0.0] * length) for label in labels}
+        for (label, vector), (count, weight) in collapsed.items():
+            dishes, servings = result[label]
+            for idx in vector.indices():
+                dishes[idx] += count
+                servings[idx] += weight
+        return result
+
+    def _sum_quantities(self, plan, group_field):
+        """
+        ({(group, idx): (total, unit)}, conflicts). The first unit seen for an
+        ingredient in a group sets its total's unit; amounts in any other unit
+        cannot be added to it and are returned as conflicts.
+        """
+        amounts = {}
+        conflicts = []
+        for idx, amount, unit, groups in self.quantities.get(plan, []):
+            key = (groups[group_field], idx)
+            if key in amounts and amounts[key][1] != unit:
+                conflicts.append((key[0], idx, amount, unit, amounts[key][1]))
+                continue
+            amounts[key] = (amounts.get(key, (0, unit))[0] + amount, unit)
+        return amounts, conflicts
+
+    def issues(self, group_field):
+        """Unresolved components and unit conflicts for one grouping, as ISSUE_FIELDS rows."""
+        issues = [{"kind": "unresolved", "group_by": group_field, "customer_plan": "", "group": "", "ingredient": "",
+                   "quantity": "", "unit": "", "detail": label} for label in self.unresolved]
+        for plan in sorted(self.quantities):
+            domain = self._resources(plan).master_ingredient_domain
+            for group, idx, amount, unit, total_unit in self._sum_quantities(plan, group_field)[1]:
+                issues.append({
+                    "kind": "unit_conflict", "group_by": group_field, "customer_plan": plan, "group": group,
+                    "ingredient": domain[idx], "quantity": round(amount, 2), "unit": unit,
+                    "detail": f"not added to the {total_unit} total",
+                })
+        return issues
+
+    def rows(self, group_field):
+        """Shopping list rows (see ROW_FIELDS) for one grouping, sorted by plan, group, ingredient."""
+        rows = []
+        for plan in sorted(set(self.components) | set(self.quantities)):
+            domain = self._resources(plan).master_ingredient_domain
+            amounts, _ = self._sum_quantities(plan, group_field)
+            for group, (dishes, servings) in sorted(self._sum_vectors(plan, group_field).items()):
+                for idx, count in enumerate(dishes):
+                    if not count:
+                        continue
+                    amount, unit = amounts.get((group, idx), (None, ""))
+                    rows.append({
+                        "customer_plan": plan,
+                        "group": group,
+                        "ingredient": domain[idx],
+                        "dishes": int(count),
+                        "servings": round(servings[idx], 2),
+                        "quantity": round(amount, 2) if amount is not None else "",
+                        "unit": unit,
+                    })
+        return rows
+
+    def write(self, output_prefix, fmt="csv"):
+        """
+        Write {output_prefix}_{group_field}.{csv|json} per grouping plus
+        {output_prefix}_issues.{csv|json} (unresolved components and unit
+        conflicts for every grouping); returns the paths.
+        """
+        paths = []
+        all_issues = []
+        for group_field in self.group_fields:
+            path = f"{output_prefix}_{group_field}.{fmt}"
+            rows = self.rows(group_field)
+            issues = self.issues(group_field)
+            all_issues.extend(issues)
+            with open(path, "w", newline="") as out:
+                if fmt == "json":
+                    json.dump({
+                        "group_by": group_field, "rows": rows, "unresolved": self.unresolved,
+                        "unit_conflicts": [issue for issue in issues if issue["kind"] == "unit_conflict"],
+                    }, out, indent=2, ensure_ascii=False)
+                else:
+                    writer = csv.DictWriter(out, fieldnames=ROW_FIELDS)
+                    writer.writeheader()
+                    writer.writerows(rows)
+            paths.append(path)
+
+        path = f"{output_prefix}_issues.{fmt}"
+        with open(path, "w", newline="") as out:
+            if fmt == "json":
+                json.dump({"issues": all_issues}, out, indent=2, ensure_ascii=False)
+            else:
+                writer = csv.DictWriter(out, fieldnames=ISSUE_FIELDS)
+                writer.writeheader()
+                writer.writerows(all_issues)
+        paths.append(path)
+        return paths
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aggregate an order sheet into per-chef and per-zone shopping lists.")
+    parser.add_argument("--orders", required=True, help="JSONL or CSV order sheet")
+    parser.add_argument("--output", default="shopping", help="Output prefix (default: shopping -> shopping_chef.csv, shopping_zone.csv)")
+    parser.add_argument("--format", choices=["csv", "json"], default="csv")
+    args = parser.parse_args()
+
+    rollup = ProcurementRollup()
+    rollup.add_orders(load_orders(args.orders))
+    for path in rollup.write(args.output, args.format):
+        print(f"Wrote {path}")
+    conflicts = sum(1 for field in rollup.group_fields for issue in rollup.issues(field) if issue["kind"] == "unit_conflict")
+    if rollup.unresolved or conflicts:
+        print(f"{len(rollup.unresolved)} components without ingredient data and {conflicts} unit conflicts "
+              f"(listed in {args.output}_issues.{args.format})")
@@ -0,0 +1,68 @@
+"""
+Compact encodings of the per-plan tables embedded in every prompt. The
+master ingredient table becomes "index:name" pairs grouped by category, so
+each index is its vector position. The single-serve guideline table becomes
+one "name | serving | portion" line per row, optionally keeping only the
+protein rows that an order refers to.
+"""
+
+import math
+import re
+
+# Protein rows of single_serve_guidelines_new.csv and the words that mark an order as using them
+PROTEIN_KEYWORDS = {
+    "Soy Chunks": ("soy chunks", "soya"),
+    "Kidney Beans (Rajma)": ("rajma", "kidney bean"),
+    "Chickpeas (Chana)": ("chickpea", "chana", "chole"),
+    "Eggs": ("egg", "eggs", "bhurji", "omelette"),
+    "Fish (Rohu)": ("fish", "rohu"),
+    "Tofu": ("tofu",),
+    "Chicken": ("chicken",),
+    "Paneer": ("paneer",),
+    "Mutton": ("mutton", "lamb", "goat"),
+    "Shrimp": ("shrimp", "prawn", "prawns"),
+}
+PROTEIN_PATTERNS = {
+    protein: re.compile(r"\b(?:" + "|".join(re.escape(word) for word in words) + r")\b", re.IGNORECASE)
+    for protein, words in PROTEIN_KEYWORDS.items()
+}
+# Rough token estimate for English prompt text
+CHARS_PER_TOKEN = 4
+
+def compact_domain(domain, categories):
+    """
+    One line per category: "<category>: 0:lemon, 1:peeled garlic, ...".
+    Indices are positions in domain, i.e. in every ingredient vector.
+    """
+    groups = {}
+    for idx, (name, category) in enumerate(zip(domain, categories)):
+        groups.setdefault(category, []).append(f"{idx}:{name}")
+    return "\n".join(f"{category}: {', '.join(items)}" for category, items in groups.items())
+
+def order_proteins(texts):
+    """Guideline protein rows mentioned anywhere in texts (dish titles, choices, ingredient lists)."""
+    text = " ".join(str(value) for value in texts if value)
+    return frozenset(protein for protein, pattern in PROTEIN_PATTERNS.items() if pattern.search(text))
+
+def compact_guidelines(columns, rows, proteins=None):
+    """
+    Guideline table as "name | serving | portion" lines under a header line.
+    With a non-empty proteins set, protein rows not in it are left out; all
+    other rows are kept.
+    """
+    lines = [" | ".join(str(column).strip() for column in columns)]
+    for row in rows:
+        name = str(row[0]).strip()
+        if proteins and name in PROTEIN_KEYWORDS and name not in proteins:
+            continue
+        lines.append(" | ".join("" if value is None else str(value).strip() for value in row))
+    return "\n".join(lines)
+
+def prompt_size(prompt):
+    """{"chars", "bytes", "lines", "approx_tokens"} for a rendered prompt."""
+    return {
+        "chars": len(prompt),
+        "bytes": len(prompt.encode("utf-8")),
+        "lines": prompt.count("\n") + 1,
+        "approx_tokens": math.ceil(len(prompt) / CHARS_PER_TOKEN),
+    }
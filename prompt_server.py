@@ -0,0 +1,255 @@
+"""
+Local HTTP/JSON prompt service: keeps one warm MacroChefGenerator and
+FinalCheckGenerator per plan and renders prompts per request. Data files are
+resolved against --base-dir (not the CWD) and generators are rebuilt when
+any of a plan's files change.
+
+    python prompt_server.py --port 8765
+
+    POST /prompt        order object (recipe_config.json shape)  -> {"prompt": ..., "size": {...}}
+    POST /prompts       {"orders": [...]}                         -> {"results": [{"prompt", "size"}|{"error"}, ...]}
+    POST /final-check   {"customer_plan", "llm_output"}           -> {"status", "report", "prompt"}
+
+    Orders may set "compact": true (and "restrict_guidelines": false) for
+    compact prompts; /final-check accepts "compact" for the escalation prompt.
+    GET  /health        loaded plans and their data fingerprints
+    GET  /metrics       Prometheus text (when metrics are enabled)
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from main import MacroChefGenerator, order_flag, order_to_kwargs
+from final_check import FinalCheckGenerator
+from plan_registry import get_plan_resources
+from instrumentation import PrometheusFileSink, enable_metrics, get_metrics, logger
+from prompt_compaction import prompt_size
+
+DEFAULT_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MAX_BODY_BYTES = 1024 * 1024
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class GeneratorPool:
+    """
+    Warm generators per plan. Each request checks (at most every
+    reload_interval seconds) whether the plan's files changed; if so the
+    generators are rebuilt off the event loop while requests keep using the
+    previous ones.
+    """
+    def __init__(self, base_dir, plans, reload_interval=1.0):
+        self.base_dir = os.path.abspath(base_dir)
+        self.plans = tuple(plans)
+        self.reload_interval = reload_interval
+        self.generators = {}
+        self.checked_at = {}
+        self.locks = {plan: asyncio.Lock() for plan in self.plans}
+        self.reloads = {plan: 0 for plan in self.plans}
+
+    def _build(self, plan):
+        return (MacroChefGenerator(customer_plan=plan, base_dir=self.base_dir),
+                FinalCheckGenerator(customer_plan=plan, base_dir=self.base_dir))
+
+    async def warm(self):
+        for plan in self.plans:
+            await self.get(plan)
+
+    async def get(self, plan):
+        """(MacroChefGenerator, FinalCheckGenerator) for plan, rebuilt if its files changed."""
+        if plan not in self.locks:
+            raise RequestError(400, f"Unknown customer_plan '{plan}'. Served plans: {list(self.plans)}")
+        now = time.monotonic()
+        current = self.generators.get(plan)
+        if current is not None and now - self.checked_at[plan] < self.reload_interval:
+            return current
+
+        async with self.locks[plan]:
+            current = self.generators.get(plan)
+            # get_plan_resources stats the plan's files and reloads them if they changed
+            resources = await asyncio.to_thread(get_plan_resources, plan, self.base_dir)
+            if current is None or current[0].resources is not resources:
+                if current is not None:
+                    self.reloads[plan] += 1
+                    logger.info("Rebuilt %s generators after a data change", plan, extra={"event": "generator_reload", "plan": plan})
+                current = await asyncio.to_thread(self._build, plan)
+                self.generators[plan] = current
+            self.checked_at[plan] = time.monotonic()
+            return current
+
+    def status(self):
+        return {
+            plan: {
+                "loaded": plan in self.generators,
+                "reloads": self.reloads[plan],
+                "data_fingerprint": self.generators[plan][0].resources.content_fingerprint if plan in self.generators else None,
+            }
+            for plan in self.plans
+        }
+
+class PromptServer:
+    """Minimal HTTP/1.1 (keep-alive, Content-Length bodies) JSON server over asyncio streams."""
+    def __init__(self, pool):
+        self.pool = pool
+        self.routes = {
+            ("POST", "/prompt"): self.handle_prompt,
+            ("POST", "/prompts"): self.handle_prompts,
+            ("POST", "/final-check"): self.handle_final_check,
+            ("GET", "/health"): self.handle_health,
+            ("GET", "/metrics"): self.handle_metrics,
+        }
+
+    async def render(self, order):
+        if not isinstance(order, dict):
+            raise RequestError(400, "Each order must be a JSON object")
+        generator, _ = await self.pool.get(order.get("customer_plan") or "SUB")
+        return generator.create_prompt(**order_to_kwargs(order))
+
+    async def handle_prompt(self, payload):
+        prompt = await self.render(payload)
+        return 200, {"prompt": prompt, "size": prompt_size(prompt)}
+
+    async def handle_prompts(self, payload):
+        orders = payload.get("orders") if isinstance(payload, dict) else None
+        if not isinstance(orders, list):
+            raise RequestError(400, 'Expected {"orders": [...]}')
+        results = []
+        for order in orders:
+            try:
+                prompt = await self.render(order)
+                results.append({"prompt": prompt, "size": prompt_size(prompt)})
+            except RequestError as e:
+                results.append({"error": str(e)})
+            except Exception as e:
+                results.append({"error": f"{type(e).__name__}: {e}"})
+        return 200, {"results": results}
+
+    async def handle_final_check(self, payload):
+        if not isinstance(payload, dict) or not isinstance(payload.get("llm_output"), str):
+            raise RequestError(400, 'Expected {"customer_plan": ..., "llm_output": "..."}')
+        _, checker = await self.pool.get(payload.get("customer_plan") or "SUB")
+        compact = order_flag(payload.get("compact"), False)
+        if payload.get("force_llm"):
+            return 200, {"status": "escalate", "report": None, "prompt": checker.create_prompt(payload["llm_output"], compact)}
+        result = checker.check(payload["llm_output"], compact)
+        return 200, {"status": result["status"], "report": result["report"].to_dict(), "prompt": result["prompt"]}
+
+    async def handle_health(self, payload):
+        return 200, {"status": "ok", "base_dir": self.pool.base_dir, "plans": self.pool.status()}
+
+    async def handle_metrics(self, payload):
+        metrics = get_metrics()
+        if not metrics.enabled:
+            raise RequestError(404, "Metrics are disabled (set MACROCHEF_METRICS=1 or --metrics)")
+        return 200, PrometheusFileSink(None).render(metrics.snapshot())
+
+    async def _read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError:
+            raise RequestError(400, "Malformed request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise RequestError(400, "Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise RequestError(413, f"Body larger than {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b""
+        keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+        return method, target.split("?", 1)[0], body, keep_alive
+
+    async def _dispatch(self, method, path, body):
+        handler = self.routes.get((method, path))
+        if handler is None:
+            if any(route_path == path for _, route_path in self.routes):
+                raise RequestError(405, f"{method} not allowed on {path}")
+            raise RequestError(404, f"No route for {path}")
+        payload = None
+        if body:
+            try:
+                payload = json.loads(body)
+            except ValueError as e:
+                raise RequestError(400, f"Invalid JSON body: {e}")
+        return await handler(payload)
+
+    def _write_response(self, writer, status, body, keep_alive):
+        if isinstance(body, str):
+            data, content_type = body.encode("utf-8"), "text/plain; version=0.0.4"
+        else:
+            data, content_type = json.dumps(body, ensure_ascii=False).encode("utf-8"), "application/json"
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: {content_type}; charset=utf-8\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + data)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    method, path, body, keep_alive = request
+                    start = time.perf_counter()
+                    status, response = await self._dispatch(method, path, body)
+                    get_metrics().observe("request", time.perf_counter() - start, path=path)
+                except RequestError as e:
+                    status, response = e.status, {"error": str(e)}
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception as e:
+                    logger.exception("Request failed", extra={"event": "request_error", "error": str(e)})
+                    status, response = 500, {"error": f"{type(e).__name__}: {e}"}
+                get_metrics().incr("requests", status=status)
+                self._write_response(writer, status, response, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+async def serve(host, port, base_dir, plans, reload_interval):
+    pool = GeneratorPool(base_dir, plans, reload_interval)
+    await pool.warm()
+    app = PromptServer(pool)
+    server = await asyncio.start_server(app.handle_connection, host, port)
+    addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+    print(f"Serving prompts for {list(plans)} on {addresses} (data: {pool.base_dir})", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve MacroChef prompts over HTTP with warm generators per plan.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--base-dir", default=DEFAULT_BASE_DIR, help="Directory with the CSVs, DBs and templates (default: this file's directory)")
+    parser.add_argument("--plans", nargs="+", default=["SUB", "DEMO"])
+    parser.add_argument("--reload-interval", type=float, default=1.0, help="Seconds between data-change checks per plan")
+    parser.add_argument("--metrics", action="store_true", help="Record metrics and expose them on GET /metrics")
+    args = parser.parse_args()
+
+    if args.metrics:
+        enable_metrics()
+    try:
+        asyncio.run(serve(args.host, args.port, args.base_dir, args.plans, args.reload_interval))
+    except KeyboardInterrupt:
+        pass
@@ -4,6 +4,13 @@ Run this script to create recipe_config.json with dropdown menus
 """
 
 import json
+from variant_index import VariantIndex
+
+DEFAULT_BASES = {
+    "Salad Meal": "C01-B Salad Meal",
+    "Chinese Bowl": "C02-B Chinese Bowl",
+    "Sandwich": "C03-B Sandwich",
+}
 
 def load_json(filename):
     try:
@@ -65,46 +72,8 @@ def main():
     side_dish_options = list(side_dishes.keys())
     carb_options = list(carbs.keys())
 
-    # Parse custom recipes to extract base dishes, proteins, carbs, sauces, dressings
-    salad_bases = set()
-    chinese_bases = set()
-    sandwich_bases = set()
-    proteins_salad = set()
-    proteins_chinese = set()
-    proteins_sandwich = set()
-    dressings = set()
-    sauces = set()
-    carb_choices_chinese = set()
-
-    for key in custom_recipes.keys():
-        if "Salad" in key:
-            # Parse: "C01-B Salad Meal (Paneer, Vinaigrette)"
-            base = key.split(" (")[0]
-            salad_bases.add(base)
-            if "(" in key:
-                params = key.split("(")[1].rstrip(")").split(", ")
-                if len(params) >= 1:
-                    proteins_salad.add(params[0])
-                if len(params) >= 2:
-                    dressings.add(params[1])
-        elif "Chinese" in key:
-            base = key.split(" (")[0]
-            chinese_bases.add(base)
-            if "(" in key:
-                params = key.split("(")[1].rstrip(")").split(", ")
-                if len(params) >= 1:
-                    proteins_chinese.add(params[0])
-                if len(params) >= 2:
-                    carb_choices_chinese.add(params[1])
-        elif "Sandwich" in key:
-            base = key.split(" (")[0]
-            sandwich_bases.add(base)
-            if "(" in key:
-                params = key.split("(")[1].rstrip(")").split(", ")
-                if len(params) >= 1:
-                    proteins_sandwich.add(params[0])
-                if len(params) >= 2:
-                    sauces.add(params[1])
+    # Structured index of custom recipes: bases, proteins and options per dish type
+    variant_index = VariantIndex(custom_recipes)
 
     config = {}
 
@@ -151,23 +120,24 @@ def main():
         print("-"*50)
 
         # Select dish type
-        dish_types = ["Salad Meal", "Chinese Bowl", "Sandwich"]
+        dish_types = list(variant_index.dish_types)
         dish_type = display_menu("SELECT DISH TYPE", dish_types, allow_skip=False)
 
-        if dish_type == "Salad Meal":
-            config["dish_title"] = list(salad_bases)[0] if salad_bases else "C01-B Salad Meal"
-            config["protein_choice"] = display_menu("SELECT PROTEIN", list(proteins_salad), allow_skip=False)
-            config["dressing_choice"] = display_menu("SELECT DRESSING", list(dressings), allow_skip=False)
-
-        elif dish_type == "Chinese Bowl":
-            config["dish_title"] = list(chinese_bases)[0] if chinese_bases else "C02-B Chinese Bowl"
-            config["protein_choice"] = display_menu("SELECT PROTEIN", list(proteins_chinese), allow_skip=False)
-            config["carb_choice"] = display_menu("SELECT CARB", list(carb_choices_chinese), allow_skip=False)
-
-        elif dish_type == "Sandwich":
-            config["dish_title"] = list(sandwich_bases)[0] if sandwich_bases else "C03-B Sandwich"
-            config["protein_choice"] = display_menu("SELECT PROTEIN", list(proteins_sandwich), allow_skip=False)
-            config["sauce_choice"] = display_menu("SELECT SAUCE", list(sauces), allow_skip=False)
+        dish_options = variant_index.options(dish_type)
+        option_labels = {
+            "dressing_choice": "SELECT DRESSING",
+            "carb_choice": "SELECT CARB",
+            "sauce_choice": "SELECT SAUCE",
+        }
+        bases = dish_options["bases"]
+        config["dish_title"] = bases[0] if bases else DEFAULT_BASES[dish_type]
+        config["protein_choice"] = display_menu("SELECT PROTEIN", dish_options["proteins"], allow_skip=False)
+        config[dish_options["option_field"]] = display_menu(
+            option_labels[dish_options["option_field"]], dish_options["options"], allow_skip=False)
+
+        problems = variant_index.validate(config["dish_title"], config["protein_choice"], config[dish_options["option_field"]])
+        if problems:
+            print(f"\nWARNING: {problems[0]}")
 
         # Serving size
         serving = get_text_input("Enter serving size (1-4):", allow_empty=False)
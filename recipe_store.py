@@ -0,0 +1,185 @@
+"""
+Storage for the JSON recipe databases (side_dish_db, custom_recipe_bank,
+carb_db). Besides plain JSON loading, a database can be converted to JSONL
+with an offset index and opened as a JsonlStore, which memory-maps the file
+and decodes entries only when they are looked up.
+
+    python recipe_store.py side_dish_db.json custom_recipe_bank.json carb_db.json [--output-dir DIR]
+"""
+
+import argparse
+import json
+import mmap
+import os
+from collections import OrderedDict
+from collections.abc import Mapping
+from instrumentation import logger
+
+STORE_VERSION = 1
+INDEX_SUFFIX = ".idx"
+
+class DatabaseLoadError(Exception):
+    """A recipe database exists but cannot be read or parsed."""
+    def __init__(self, path, reason):
+        super().__init__(f"Cannot load {path}: {reason}")
+        self.path = path
+        self.reason = reason
+
+def load_json_db(path):
+    """
+    Whole-file load of a JSON database. A missing file is reported and
+    treated as empty (the DBs are optional per deployment); unreadable or
+    malformed files raise DatabaseLoadError.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        logger.warning("Database %s not found, using an empty database.", path,
+                       extra={"event": "db_missing", "db": path})
+        return {}
+    except json.JSONDecodeError as e:
+        raise DatabaseLoadError(path, f"invalid JSON at line {e.lineno}, column {e.colno}: {e.msg}") from e
+    except (OSError, UnicodeDecodeError) as e:
+        raise DatabaseLoadError(path, e) from e
+    if not isinstance(data, dict):
+        raise DatabaseLoadError(path, f"expected a JSON object, got {type(data).__name__}")
+    return data
+
+def store_paths(json_path, store_dir=None):
+    """(jsonl path, index path) for a database's .json path, in store_dir or next to the JSON."""
+    name = os.path.splitext(os.path.basename(json_path))[0] + ".jsonl"
+    jsonl_path = os.path.join(store_dir or os.path.dirname(json_path), name)
+    return jsonl_path, jsonl_path + INDEX_SUFFIX
+
+def _source_stamp(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+def convert_json(json_path, jsonl_path=None):
+    """
+    Write json_path as JSONL (one {"key", "value"} object per line, in the
+    original order) plus an index of [key, offset, length] rows stamped
+    with the source file's size/mtime. Returns the JSONL path.
+    """
+    jsonl_path = jsonl_path or store_paths(json_path)[0]
+    data = load_json_db(json_path)
+    os.makedirs(os.path.dirname(jsonl_path) or ".", exist_ok=True)
+
+    rows = []
+    tmp_path = f"{jsonl_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as out:
+        for key, value in data.items():
+            line = json.dumps({"key": key, "value": value}, ensure_ascii=False).encode("utf-8") + b"\n"
+            rows.append([key, out.tell(), len(line)])
+            out.write(line)
+    os.replace(tmp_path, jsonl_path)
+
+    index = {
+        "version": STORE_VERSION,
+        "source": _source_stamp(json_path) if os.path.exists(json_path) else None,
+        "rows": rows,
+    }
+    tmp_index = f"{jsonl_path}{INDEX_SUFFIX}.{os.getpid()}.tmp"
+    with open(tmp_index, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_index, jsonl_path + INDEX_SUFFIX)
+    return jsonl_path
+
+class JsonlStore(Mapping):
+    """
+    Read-only dict-like view of a converted database. Only the key index is
+    resident; values are decoded from the memory-mapped JSONL on lookup and
+    kept in a small LRU (cache_size entries). Iteration order matches the
+    source JSON.
+    """
+    def __init__(self, jsonl_path, cache_size=256):
+        self.path = jsonl_path
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        try:
+            with open(jsonl_path + INDEX_SUFFIX, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            self.offsets = {key: (offset, length) for key, offset, length in index["rows"]}
+            self.source = index.get("source")
+            self.version = index.get("version")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            raise DatabaseLoadError(jsonl_path + INDEX_SUFFIX, e) from e
+
+        self._file = None
+        self._map = None
+        if self.offsets:
+            try:
+                self._file = open(jsonl_path, "rb")
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError) as e:
+                raise DatabaseLoadError(jsonl_path, e) from e
+
+    def __getitem__(self, key):
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        offset, length = self.offsets[key]
+        try:
+            value = json.loads(self._map[offset:offset + length])["value"]
+        except (ValueError, KeyError) as e:
+            raise DatabaseLoadError(self.path, f"corrupt entry {key!r} at offset {offset}: {e}") from e
+        self.cache[key] = value
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return value
+
+    def __contains__(self, key):
+        return key in self.offsets
+
+    def __iter__(self):
+        return iter(self.offsets)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = self._file = None
+
+def open_store(json_path, store_dir=None, cache_size=256):
+    """
+    JsonlStore for a database's .json path, (re)converting into store_dir
+    first when the JSONL is missing or was built from a different version
+    of the JSON. Falls back to an empty dict (with a warning) if neither
+    file exists.
+    """
+    jsonl_path, index_path = store_paths(json_path, store_dir)
+    if not os.path.exists(json_path):
+        if os.path.exists(index_path):
+            return JsonlStore(jsonl_path, cache_size)
+        logger.warning("Database %s not found, using an empty database.", json_path,
+                       extra={"event": "db_missing", "db": json_path})
+        return {}
+
+    if os.path.exists(index_path) and os.path.exists(jsonl_path):
+        try:
+            store = JsonlStore(jsonl_path, cache_size)
+            if store.version == STORE_VERSION and store.source == _source_stamp(json_path):
+                return store
+            store.close()
+        except DatabaseLoadError:
+            pass
+    convert_json(json_path, jsonl_path)
+    return JsonlStore(jsonl_path, cache_size)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert JSON recipe databases to indexed JSONL stores.")
+    parser.add_argument("databases", nargs="+", help="JSON database files")
+    parser.add_argument("--output-dir", help="Where to write the .jsonl/.idx files (default: next to each JSON)")
+    args = parser.parse_args()
+
+    for json_path in args.databases:
+        try:
+            jsonl_path = convert_json(json_path, store_paths(json_path, args.output_dir)[0])
+        except DatabaseLoadError as e:
+            print(f"ERROR: {e}")
+            exit(1)
+        print(f"{json_path} -> {jsonl_path} ({len(JsonlStore(jsonl_path))} entries)")
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from main import ORDER_FIELDS
+
+# Order fields that shape the prompt for each mode
+MODE_FIELDS = {
+    "prefab": ["dish_title", "serving_size", "side_title", "carb_side_title"],
+    "custom_prefab": ["dish_title", "serving_size", "protein_choice", "carb_choice", "sauce_choice", "dressing_choice", "side_title"],
+    "full_custom": ["full_custom_request"],
+}
+COMMON_FIELDS = ["customization_string", "translation_lang"]
+
+def _normalize_value(value):
+    if value is None:
+        return None
+    text = " ".join(str(value).split())
+    if text == "" or text.lower() == "none":
+        return None
+    try:
+        number = float(text)
+        # "2", "2.0" and "2.00" are the same serving size
+        return format(number, "g")
+    except ValueError:
+        return text
+
+def normalize_context(order):
+    """
+    Canonical form of the prompt-relevant part of an order: only the fields
+    the order's mode uses, whitespace collapsed, empty/"None" values as None.
+    """
+    mode = order.get("mode") or "prefab"
+    fields = MODE_FIELDS.get(mode, ORDER_FIELDS) + COMMON_FIELDS
+    context = {"customer_plan": order.get("customer_plan") or "SUB", "mode": mode}
+    for field in fields:
+        context[field] = _normalize_value(order.get(field))
+    return context
+
+def cache_key(order, data_fingerprint):
+    """Content address: hash of the normalized context plus the plan's data/template fingerprint."""
+    payload = json.dumps({"context": normalize_context(order), "data": data_fingerprint}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """
+    Two-tier cache of LLM results: an in-memory LRU in front of a SQLite file.
+    Entries expire after ttl seconds; the disk tier is trimmed to max_entries
+    by least-recent access. Because keys include the plan's content
+    fingerprint, editing a template, ingredient CSV or DB simply stops
+    matching old entries (they age out via TTL/size eviction).
+    """
+    def __init__(self, path=os.path.join(".macrochef_cache", "responses.sqlite"), memory_size=1024, ttl=7 * 24 * 3600, max_entries=100000):
+        self.memory_size = memory_size
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "shared_hits": 0, "misses": 0, "sets": 0, "evictions": 0, "expired": 0}
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+        self.db.commit()
+
+    def _remember(self, key, value, created_at):
+        self.memory[key] = (value, created_at)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def get(self, key):
+        """Return the cached value (any JSON-serializable object) or None."""
+        now = time.time()
+        with self.lock:
+            if key in self.memory:
+                value, created_at = self.memory[key]
+                if now - created_at <= self.ttl:
+                    self.memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return value
+                del self.memory[key]
+
+            row = self.db.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            value, created_at = json.loads(row[0]), row[1]
+            if now - created_at > self.ttl:
+                self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.db.commit()
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+
+            self.db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.db.commit()
+            self._remember(key, value, created_at)
+            self.stats["disk_hits"] += 1
+            return value
+
+    def set(self, key, value):
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now),
+            )
+            self._remember(key, value, now)
+            self.stats["sets"] += 1
+            if self.stats["sets"] % 100 == 0:
+                self._evict(now)
+            self.db.commit()
+
+    def _evict(self, now):
+        expired = self.db.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,)).rowcount
+        count = self.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        overflow = max(0, count - self.max_entries)
+        if overflow:
+            self.db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+        self.stats["evictions"] += expired + overflow
+
+    def record_shared(self):
+        """A get() miss that was then answered by an identical in-flight request: count it as a hit."""
+        with self.lock:
+            self.stats["misses"] -= 1
+            self.stats["shared_hits"] += 1
+
+    def hit_rate(self):
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"] + self.stats["shared_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    def report(self):
+        return dict(self.stats, hit_rate=round(self.hit_rate(), 4), memory_entries=len(self.memory))
+
+    def close(self):
+        with self.lock:
+            self._evict(time.time())
+            self.db.commit()
+            self.db.close()
@@ -0,0 +1,217 @@
+import math
+import re
+from ingredient_matcher import IngredientMatcher
+
+UNICODE_FRACTIONS = {"¼": 0.25, "½": 0.5, "¾": 0.75, "⅓": 1 / 3, "⅔": 2 / 3, "⅛": 0.125}
+QUARTER_GLYPHS = {0.25: "¼", 0.5: "½", 0.75: "¾"}
+SPOON_UNITS = ("tsp", "tbsp", "cup", "cups")
+
+# Units whose amounts scale linearly with servings (count nouns included)
+UNITS = r"(?:kg|gms?|grams?|g|ml|litres?|l|tsp|tbsp|cups?|eggs?|pieces?|nos|rotis?|units?|slices?|servings?)"
+NUMBER = r"(?:\d+(?:\.\d+)?(?:\s*[¼½¾⅓⅔⅛])?|\d+/\d+|[¼½¾⅓⅔⅛])"
+QUANTITY = re.compile(
+    r"(?<![\w.])(?P<low>" + NUMBER + r")(?:\s*[-–]\s*(?P<high>" + NUMBER + r"))?"
+    r"(?P<space>\s*)(?P<unit>" + UNITS + r")(?![a-zA-Z])",
+    re.IGNORECASE,
+)
+# Counted items written after descriptors: "4–5 chopped peeled garlic cloves", "1–2 dried red chillies"
+COUNT_NOUNS = r"(?:cloves?|chill(?:i|y|ies)|tomato(?:es)?|onions?|leaves|leaf|pods?|sprigs?|strands?)"
+DESCRIPTORS = r"(?:chopped|peeled|dried|red|green|whole|slit|crushed|minced|sliced|fresh|small|medium|large|garlic|curry|bay|cardamom|mint)"
+COUNT_QUANTITY = re.compile(
+    r"(?<![\w.])(?P<low>" + NUMBER + r")(?:\s*[-–]\s*(?P<high>" + NUMBER + r"))?"
+    r"(?P<noun>\s+(?:" + DESCRIPTORS + r"\s+){0,3}" + COUNT_NOUNS + r")(?![a-zA-Z])",
+    re.IGNORECASE,
+)
+NOT_LINEAR_MARKER = "scaling logic included"
+# A quantity followed by "per <something>" in the same clause is a rate ("25g Atta per Roti")
+RATE_CONTEXT = re.compile(r"(?:[^=,;()\n.]|\.(?=\d))*?\bper\b", re.IGNORECASE)
+
+def parse_amount(text):
+    text = text.strip()
+    if "/" in text:
+        numerator, denominator = text.split("/")
+        return float(numerator) / float(denominator)
+    value = 0.0
+    if text and text[-1] in UNICODE_FRACTIONS:
+        value += UNICODE_FRACTIONS[text[-1]]
+        text = text[:-1].strip()
+    if text:
+        value += float(text)
+    return value
+
+def round_half_up(value, step=1):
+    # round() sends halves to even (0.625 tsp -> ½); kitchen amounts round halves up.
+    # The epsilon absorbs float error such as 0.15 / 0.1 == 1.4999999999999998.
+    return math.floor(value / step + 0.5 + 1e-9) * step
+
+def format_amount(value, unit):
+    """
+    Whole grams/ml; quarter glyphs for spoons/cups/counts; otherwise one
+    decimal, halves rounding up. A nonzero amount never rounds to 0:
+    spoons/cups go down to ⅛, anything else falls back to two decimals.
+    """
+    if unit.lower() in ("g", "gm", "gms", "gram", "grams", "ml"):
+        if value > 0 and round_half_up(value) == 0:
+            return format(round(value, 2), "g")
+        return str(int(round_half_up(value)))
+    if unit.lower() in SPOON_UNITS and 0 < value < 0.1875:
+        # Closer to ⅛ than to ¼
+        return "⅛"
+    quarters = round_half_up(value, 0.25)
+    if value > 0 and quarters == 0:
+        return format(round(value, 2), "g")
+    if abs(quarters - value) < 1e-9 or unit.lower() in SPOON_UNITS:
+        whole = int(math.floor(quarters))
+        fraction = round(quarters - whole, 2)
+        if fraction == 0:
+            return str(whole)
+        glyph = QUARTER_GLYPHS[fraction]
+        return f"{whole}{glyph}" if whole else glyph
+    text = format(round(round_half_up(value, 0.1), 1), "g")
+    return format(round(value, 2), "g") if value > 0 and text == "0" else text
+
+def format_count(value):
+    """Counted items (cloves, chillies) to the nearest half, at least ½."""
+    halves = max(round_half_up(value, 0.5), 0.5) if value > 0 else 0
+    return format_amount(halves, "pieces")
+
+def scale_text(text, factor):
+    """
+    Multiply every "<number> <unit>" quantity (and ranges) in text by factor,
+    then every counted item ("4–5 chopped peeled garlic cloves").
+    Rates ("25g dry Atta per Roti", "50g per serving") are left unchanged.
+    """
+    def scale_range(match, source, tail, format_value):
+        if RATE_CONTEXT.match(source, match.end()):
+            return match.group(0)
+        low = format_value(parse_amount(match.group("low")) * factor)
+        high = match.group("high")
+        if high is not None:
+            separator = match.group(0)[len(match.group("low")):match.start("high") - match.start(0)]
+            low = f"{low}{separator}{format_value(parse_amount(high) * factor)}"
+        return low + tail
+
+    def replace(match):
+        unit = match.group("unit")
+        return scale_range(match, text, match.group("space") + unit, lambda value: format_amount(value, unit))
+
+    scaled = QUANTITY.sub(replace, text)
+    return COUNT_QUANTITY.sub(lambda match: scale_range(match, scaled, match.group("noun"), format_count), scaled)
+
+def parse_serving_size(serving_size):
+    try:
+        value = float(serving_size)
+    except (ValueError, TypeError):
+        return 1.0
+    return value if value > 0 and math.isfinite(value) else 1.0
+
+def scaled_sop(sop, size, source_key, factor):
+    """sop with quantities multiplied by factor and a note naming the authored size it came from."""
+    if factor == 1:
+        return sop
+    return (f"SCALED FOR {format(size, 'g')} SERVINGS (x{format(round(factor, 3), 'g')} of the "
+            f"{source_key}-serving recipe): " + scale_text(sop, factor))
+
+class ScalingEngine:
+    """
+    Serving-size scaling for side dishes, carb sides and single-serve portions.
+    Authored side dish sizes are used as-is; any other size is scaled from the
+    largest authored size below it (or the 1-serving entry). Results are
+    memoized per (kind, name, size).
+    """
+    def __init__(self, side_dish_db, carb_db, guideline_rows):
+        self.side_dish_db = side_dish_db
+        self.carb_db = carb_db
+        # Portion name -> (serving size note, requested portion text)
+        self.portions = {}
+        for name, serving_note, portion in guideline_rows:
+            self.portions.setdefault(str(name).strip(), (str(serving_note), str(portion).strip()))
+        self.portion_matcher = IngredientMatcher(list(self.portions))
+        self.memo = {}
+
+    def _base_key(self, entry, size):
+        # Largest authored size <= requested size, else the smallest authored size
+        authored = sorted((float(k), k) for k in entry if k.replace(".", "", 1).isdigit())
+        if not authored:
+            return None, None
+        below = [pair for pair in authored if pair[0] <= size]
+        base, key = below[-1] if below else authored[0]
+        return key, base
+
+    def side_dish(self, side_title, serving_size):
+        """
+        {"sop", "source_sop", "active_ingredients", "source_key", "factor"} for
+        any serving size, or None if the dish is not in the side dish DB.
+        source_sop is the authored text sop was scaled from.
+        """
+        size = parse_serving_size(serving_size)
+        memo_key = ("side", side_title, size)
+        if memo_key in self.memo:
+            return self.memo[memo_key]
+
+        entry = self.side_dish_db.get(side_title)
+        result = None
+        if entry:
+            source_key, base = self._base_key(entry, size)
+            if source_key is not None:
+                source = entry[source_key]
+                factor = size / base
+                result = {
+                    "sop": scaled_sop(source["sop"], size, source_key, factor),
+                    "source_sop": source["sop"],
+                    "active_ingredients": source.get("active_ingredients", []),
+                    "source_key": source_key,
+                    "factor": factor,
+                }
+        self.memo[memo_key] = result
+        return result
+
+    def carb(self, carb_title, serving_size):
+        """
+        {"sop", "active_ingredients", "scaled_quantities", "factor"} for a carb side.
+        scaled_quantities rescales the totals in the "QUANTITY LOGIC" line;
+        per-unit and per-serving rates in it keep their values.
+        """
+        size = parse_serving_size(serving_size)
+        memo_key = ("carb", carb_title, size)
+        if memo_key in self.memo:
+            return self.memo[memo_key]
+
+        entry = self.carb_db.get(carb_title)
+        result = None
+        if entry:
+            sop = entry.get("sop", "")
+            quantity_line = next((line for line in sop.split("\n") if "QUANTITY LOGIC" in line), "")
+            result = {
+                "sop": sop,
+                "active_ingredients": entry.get("active_ingredients", []),
+                "scaled_quantities": scale_text(quantity_line.strip(), size).replace(
+                    "1 Standard Serving", f"{format(size, 'g')} Standard Serving(s)") if quantity_line else None,
+                "factor": size,
+            }
+        self.memo[memo_key] = result
+        return result
+
+    def portion(self, ingredient, serving_size):
+        """
+        {"name", "portion", "scalable"} from single_serve_guidelines_new.csv.
+        Rows marked "scaling logic included" describe their own non-linear
+        scaling and are returned unscaled with scalable=False.
+        """
+        size = parse_serving_size(serving_size)
+        memo_key = ("portion", ingredient, size)
+        if memo_key in self.memo:
+            return self.memo[memo_key]
+
+        name, idx = self.portion_matcher.match(ingredient)
+        result = None
+        if idx != -1:
+            serving_note, portion = self.portions[name]
+            scalable = NOT_LINEAR_MARKER not in serving_note
+            result = {
+                "name": name,
+                "portion": scale_text(portion, size) if scalable else portion,
+                "scalable": scalable,
+            }
+        self.memo[memo_key] = result
+        return result
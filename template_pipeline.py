@@ -0,0 +1,67 @@
+import os
+import re
+import jinja2
+
+STATIC_BLOCK = "header"
+STATIC_BLOCK_PATTERN = re.compile(r"{%-?\s*block\s+" + STATIC_BLOCK + r"\s*-?%}.*?{%-?\s*endblock(?:\s+" + STATIC_BLOCK + r")?\s*-?%}", re.DOTALL)
+# "<template>:body" names the template with its static block replaced by {{ static_prompt_header }}
+BODY_SUFFIX = ":body"
+
+class BodyLoader(jinja2.BaseLoader):
+    """
+    Wraps a loader and additionally serves "<name>:body" templates, so the
+    per-order body is loaded (and bytecode-cached) like any file template.
+    """
+    def __init__(self, loader):
+        self.loader = loader
+
+    def get_source(self, environment, template):
+        if not template.endswith(BODY_SUFFIX):
+            return self.loader.get_source(environment, template)
+        source, filename, uptodate = self.loader.get_source(environment, template[:-len(BODY_SUFFIX)])
+        return STATIC_BLOCK_PATTERN.sub("{{ static_prompt_header }}", source), filename, uptodate
+
+    def list_templates(self):
+        return self.loader.list_templates()
+
+def create_environment(base_dir, bytecode_cache_dir=None):
+    """
+    Jinja environment for a data directory. Compiled template bytecode is
+    persisted in bytecode_cache_dir so new processes skip recompilation.
+    """
+    bytecode_cache = None
+    if bytecode_cache_dir:
+        try:
+            os.makedirs(bytecode_cache_dir, exist_ok=True)
+            bytecode_cache = jinja2.FileSystemBytecodeCache(bytecode_cache_dir)
+        except OSError:
+            bytecode_cache = None
+    loader = BodyLoader(jinja2.FileSystemLoader(searchpath=base_dir))
+    return jinja2.Environment(loader=loader, bytecode_cache=bytecode_cache)
+
+class PrerenderedTemplate:
+    """
+    A prompt template whose {% block header %} (abstract, master tables,
+    vector constraints) is rendered once from the plan's static context.
+    Per-order renders only evaluate the rest of the template.
+    Templates without a header block are rendered normally.
+    """
+    def __init__(self, env, template_name, static_context):
+        self.template = env.get_template(template_name)
+        self.static_context = dict(static_context)
+
+        source, _, _ = env.loader.get_source(env, template_name)
+        if STATIC_BLOCK in self.template.blocks and len(STATIC_BLOCK_PATTERN.findall(source)) == 1:
+            block = self.template.blocks[STATIC_BLOCK]
+            self.static_text = "".join(block(self.template.new_context(self.static_context)))
+            # Same source with the static block replaced by its rendered text; shared by every
+            # static context of this template and bytecode-cached with the file templates
+            self.body = env.get_template(template_name + BODY_SUFFIX)
+        else:
+            self.static_text = None
+            self.body = self.template
+
+    def render(self, context):
+        if self.static_text is None:
+            return self.template.render(context)
+        return self.body.render(context, static_prompt_header=self.static_text)
@@ -0,0 +1,21 @@
+import os
+import pytest
+from csv_tables import format_table, melt_unique, read_table
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GOLDEN = os.path.join(REPO, "tests", "golden")
+
+def golden(name):
+    with open(os.path.join(GOLDEN, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+@pytest.mark.parametrize("name", ["ingredients_SUB", "single_serve_guidelines_new"])
+def test_format_table_matches_pandas_to_string(name):
+    # Golden files are DataFrame.to_string(index=False) output from pandas.read_csv
+    assert format_table(read_table(os.path.join(REPO, f"{name}.csv"))) + "\n" == golden(f"{name}.txt")
+
+def test_melt_unique_matches_pandas_melt_order():
+    # Golden file: pd.melt(df).dropna(subset=["value"]).drop_duplicates(subset=["value"]) as value<TAB>variable
+    flattened = melt_unique(read_table(os.path.join(REPO, "ingredients_SUB.csv")))
+    assert "".join(f"{str(value).strip()}\t{str(column).strip()}\n" for value, column in flattened) == \
+        golden("ingredients_SUB_melt.txt")
@@ -0,0 +1,48 @@
+import difflib
+import json
+import os
+import random
+from csv_tables import melt_unique, read_table
+from ingredient_matcher import IngredientMatcher
+from vector_cache import iter_entry_lists
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_FILES = ["side_dish_db.json", "carb_db.json", "custom_recipe_bank.json", "recipe_bank.json"]
+
+def linear_match(input_ing, master_list):
+    # The scan + difflib fallback IngredientMatcher replaced
+    input_clean = input_ing.lower().strip()
+    for idx, master_item in enumerate(master_list):
+        if master_item.lower().strip() == input_clean:
+            return master_item, idx
+    matches = difflib.get_close_matches(input_ing, master_list, n=1, cutoff=0.8)
+    if matches:
+        return matches[0], master_list.index(matches[0])
+    return None, -1
+
+def fuzz(name, rng):
+    chars = list(name)
+    for _ in range(rng.randint(1, 2)):
+        pos = rng.randrange(len(chars) + 1)
+        action = rng.choice(("drop", "swap", "insert"))
+        if action == "drop" and pos < len(chars):
+            del chars[pos]
+        elif action == "swap" and pos < len(chars) - 1:
+            chars[pos], chars[pos + 1] = chars[pos + 1], chars[pos]
+        else:
+            chars.insert(pos, rng.choice("aeiou s"))
+    return "".join(chars)
+
+def test_matcher_agrees_with_linear_scan_and_difflib():
+    domain = [str(value).strip() for value, _ in melt_unique(read_table(os.path.join(REPO, "ingredients_SUB.csv")))]
+    databases = {}
+    for name in DB_FILES:
+        with open(os.path.join(REPO, name), "r", encoding="utf-8") as f:
+            databases[name] = json.load(f)
+    names = sorted({item for _, _, _, items in iter_entry_lists(databases) for item in items})
+    rng = random.Random(7)
+    inputs = names + [fuzz(name, rng) for name in domain + names[:200] if name] + ["", " ", "x", "ab", "TOMATO "]
+
+    matcher = IngredientMatcher(domain)
+    for item in inputs:
+        assert matcher.match(item) == linear_match(item, domain), item
@@ -0,0 +1,28 @@
+import asyncio
+import os
+from llm_pipeline import MockLLMClient, RecipePipeline
+from response_cache import ResponseCache
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ORDER = {"order_id": "A1", "customer_plan": "SUB", "mode": "prefab", "dish_title": "Paneer Bhurji", "serving_size": "1"}
+
+class FailFirstClient(MockLLMClient):
+    async def complete(self, prompt):
+        if self.calls == 0:
+            self.calls += 1
+            await asyncio.sleep(self.latency)
+            raise ConnectionError("boom")
+        return await super().complete(prompt)
+
+def test_waiters_recover_when_first_identical_order_fails(tmp_path):
+    cache = ResponseCache(path=str(tmp_path / "responses.sqlite"))
+    client = FailFirstClient(latency=0.01)
+    pipeline = RecipePipeline(client, concurrency=4, max_retries=0, validate=False, base_dir=REPO, cache=cache)
+    records = asyncio.run(pipeline.run([dict(ORDER) for _ in range(4)]))
+    cache.close()
+
+    assert records[0]["status"] == "failed" and "boom" in records[0]["error"]
+    assert [record["status"] for record in records[1:]] == ["done"] * 3
+    assert [record["cache"] for record in records[1:]] == ["miss", "shared", "shared"]
+    assert client.calls == 2
+    assert pipeline.inflight == {}
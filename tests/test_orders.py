@@ -0,0 +1,13 @@
+import pytest
+from main import order_to_kwargs
+from response_cache import normalize_context
+
+def test_empty_csv_cells_use_defaults():
+    kwargs = order_to_kwargs({"mode": None, "dish_title": "Paneer Bhurji", "serving_size": None})
+    assert kwargs["is_prefab"] and kwargs["serving_size"] == "1"
+    assert normalize_context({"mode": None, "dish_title": "Paneer Bhurji"}) == \
+        normalize_context({"mode": "prefab", "dish_title": "Paneer Bhurji"})
+
+def test_unknown_mode_is_an_error():
+    with pytest.raises(ValueError, match="weird"):
+        order_to_kwargs({"mode": "weird", "dish_title": "Paneer Bhurji"})
@@ -0,0 +1,49 @@
+from scaling_engine import ScalingEngine, format_amount, scale_text
+
+DAL_SOP = "Rinse 50 g toor dal. Heat 1 tsp ghee. Add ¼ tsp cumin seeds and ¼ tsp turmeric, then 1½ cup water."
+SIDE_DISH_DB = {"Dal": {"1": {"sop": DAL_SOP, "active_ingredients": ["Toor Dal"]}}}
+
+def test_format_amount_never_rounds_nonzero_to_zero():
+    assert format_amount(0.125, "tsp") == "⅛"
+    assert format_amount(0.05, "tbsp") == "⅛"
+    assert format_amount(0.3, "g") == "0.3"
+    assert format_amount(0.04, "pieces") == "0.04"
+    assert format_amount(0, "tsp") == "0"
+
+def test_side_dish_below_one_serving():
+    side = ScalingEngine(SIDE_DISH_DB, {}, []).side_dish("Dal", "0.5")
+    assert side["source_key"] == "1"
+    assert side["factor"] == 0.5
+    assert " 0 tsp" not in side["sop"]
+    assert "25 g toor dal" in side["sop"]
+    assert "½ tsp ghee" in side["sop"]
+    assert "⅛ tsp cumin seeds" in side["sop"]
+    assert "¾ cup water" in side["sop"]
+
+def test_scale_text_quarter_serving():
+    assert scale_text("¼ tsp hing", 0.25) == "⅛ tsp hing"
+
+ROTI_SOP = ("COOK: Roll into discs. \nQUANTITY LOGIC: 1 Standard Serving = 2 Rotis. "
+            "(Use 25g dry Atta per Roti = 50g Total Dry Atta per serving). \n")
+
+def test_carb_quantities_keep_per_unit_rates():
+    carb = ScalingEngine({}, {"Roti": {"sop": ROTI_SOP, "active_ingredients": ["Atta"]}}, []).carb("Roti", "3")
+    assert carb["scaled_quantities"] == (
+        "QUANTITY LOGIC: 3 Standard Serving(s) = 6 Rotis. (Use 25g dry Atta per Roti = 50g Total Dry Atta per serving).")
+
+def test_scale_text_scales_totals_not_rates():
+    assert scale_text("Boil 100 g rice (50 g per serving), add 2 cups water", 2) == \
+        "Boil 200 g rice (50 g per serving), add 4 cups water"
+
+def test_non_quarter_factors_round_halves_up():
+    assert scale_text("½ tsp ghee", 1.25) == "¾ tsp ghee"
+    assert scale_text("¼ tsp hing", 1.5) == "½ tsp hing"
+    assert scale_text("1 tsp salt", 1.125) == "1¼ tsp salt"
+    assert format_amount(2.5, "g") == "3"
+    assert format_amount(0.15, "pieces") == "0.2"
+
+def test_scale_text_scales_counted_items():
+    sop = "Add 4–5 chopped peeled garlic cloves(optional), 1–2 dried red chillies or 1 tsp chilli powder."
+    assert scale_text(sop, 1.25) == \
+        "Add 5–6½ chopped peeled garlic cloves(optional), 1½–2½ dried red chillies or 1¼ tsp chilli powder."
+    assert scale_text("1 dried red chilli", 0.25) == "½ dried red chilli"
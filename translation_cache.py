@@ -0,0 +1,232 @@
+"""
+Translations of the static SOP text in the recipe DBs (side dish, carb side
+and custom recipe bank SOPs), stored per (entry, language, content hash) in
+CACHE_DIR/translations.json. MacroChefGenerator substitutes a cached
+translation for the English SOP, so only the dynamic parts of a prompt
+(generated steps, customization notes, scaling notes) are left for the LLM
+to translate. Editing an SOP changes its hash, so its stale translation
+stops being used until it is re-translated.
+
+    python translation_cache.py export --lang hindi --output pending.jsonl   # untranslated SOPs
+    python translation_cache.py import translated.jsonl                       # rows with "translation" filled in
+    python translation_cache.py translate --lang hindi --client module:Class  # fill the cache via an LLMClient
+    python translation_cache.py status
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+from vector_cache import CACHE_DIR
+from instrumentation import logger
+
+TRANSLATIONS_FILE = os.path.join(CACHE_DIR, "translations.json")
+TRANSLATIONS_VERSION = 1
+# DBs whose SOPs are static: db name -> file
+SOP_DBS = {
+    "side_dish_db": "side_dish_db.json",
+    "carb_db": "carb_db.json",
+    "recipe_bank": "custom_recipe_bank.json",
+}
+TRANSLATION_PROMPT = (
+    "Translate the following kitchen SOP into {lang} for our chefs.\n"
+    "Keep every number, unit (g, ml, tsp, tbsp, cup ...) and ingredient name exactly as written,\n"
+    "keep the line breaks, and return only the translated text.\n\n"
+    '"""\n{text}\n"""'
+)
+
+def content_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+def normalize_lang(lang):
+    """'Hindi ', 'hindi' and 'HINDI' share translations; empty/"None" means no translation."""
+    if lang is None:
+        return None
+    text = " ".join(str(lang).split()).lower()
+    return None if text in ("", "none") else text
+
+def entry_id(db_name, entry_key, serving_key=""):
+    return "/".join((db_name, entry_key, serving_key)) if serving_key else f"{db_name}/{entry_key}"
+
+def iter_sop_texts(databases):
+    """Yield (entry id, sop) for every static SOP in databases ({db name: db})."""
+    for db_name, db in databases.items():
+        for entry_key, entry in db.items():
+            if not isinstance(entry, dict):
+                continue
+            if "sop" in entry:
+                yield entry_id(db_name, entry_key), entry["sop"]
+                continue
+            for serving_key, serving in entry.items():
+                if isinstance(serving, dict) and serving.get("sop"):
+                    yield entry_id(db_name, entry_key, serving_key), serving["sop"]
+
+class TranslationCache:
+    """
+    {language: {entry id: {"hash", "text"}}} loaded from path. get() returns
+    a translation only when it was made from the exact source text given.
+    Changes are kept in memory until save().
+    """
+    def __init__(self, path=TRANSLATIONS_FILE):
+        self.path = path
+        self.languages = {}
+        self.hits = 0
+        self.misses = 0
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == TRANSLATIONS_VERSION:
+                self.languages = data.get("languages", {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning("Ignoring unreadable translation cache %s: %s", path, e,
+                           extra={"event": "translation_cache_error", "error": str(e)})
+
+    def __len__(self):
+        return sum(len(entries) for entries in self.languages.values())
+
+    def get(self, entry, lang, text):
+        """Cached translation of text for entry, or None if missing or made from different text."""
+        lang = normalize_lang(lang)
+        if lang is None:
+            return None
+        cached = self.languages.get(lang, {}).get(entry)
+        if cached is not None and cached["hash"] == content_hash(text):
+            self.hits += 1
+            return cached["text"]
+        self.misses += 1
+        return None
+
+    def put(self, entry, lang, text, translation):
+        self.languages.setdefault(normalize_lang(lang), {})[entry] = {"hash": content_hash(text), "text": translation}
+
+    def pending(self, databases, lang):
+        """[(entry id, sop)] for every static SOP without a current translation into lang."""
+        lang = normalize_lang(lang)
+        entries = self.languages.get(lang, {})
+        return [(entry, text) for entry, text in iter_sop_texts(databases)
+                if entries.get(entry, {}).get("hash") != content_hash(text)]
+
+    def prune(self, databases):
+        """Drop translations of entries that no longer exist or whose SOP changed. Returns the count."""
+        current = {entry: content_hash(text) for entry, text in iter_sop_texts(databases)}
+        removed = 0
+        for entries in self.languages.values():
+            for entry in [e for e, cached in entries.items() if current.get(e) != cached["hash"]]:
+                del entries[entry]
+                removed += 1
+        return removed
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": TRANSLATIONS_VERSION, "languages": self.languages}, f,
+                      ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+def load_sop_databases(base_dir="."):
+    databases = {}
+    for db_name, filename in SOP_DBS.items():
+        path = os.path.join(base_dir, filename)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                databases[db_name] = json.load(f)
+    return databases
+
+def export_pending(cache, databases, lang, output_path):
+    """Write untranslated SOPs as JSONL rows {entry, lang, hash, text, translation: null}."""
+    rows = cache.pending(databases, lang)
+    with open(output_path, "w", encoding="utf-8") as out:
+        for entry, text in rows:
+            row = {"entry": entry, "lang": normalize_lang(lang), "hash": content_hash(text), "text": text, "translation": None}
+            out.write(json.dumps(row, ensure_ascii=False) + "\n")
+    return len(rows)
+
+def import_rows(cache, databases, input_path):
+    """
+    Load translated JSONL rows into cache. Rows without a translation, or
+    whose source text no longer matches the DB, are skipped.
+    Returns (imported, skipped).
+    """
+    current = dict(iter_sop_texts(databases))
+    imported = skipped = 0
+    with open(input_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            text = current.get(row.get("entry"))
+            if not row.get("translation") or text is None or content_hash(text) != row.get("hash"):
+                skipped += 1
+                continue
+            cache.put(row["entry"], row["lang"], text, row["translation"])
+            imported += 1
+    return imported, skipped
+
+async def translate_pending(cache, databases, lang, client, concurrency=4):
+    """Translate every pending SOP into lang with an LLMClient. Returns (translated, failed)."""
+    semaphore = asyncio.Semaphore(concurrency)
+    results = {"translated": 0, "failed": 0}
+
+    async def translate(entry, text):
+        async with semaphore:
+            try:
+                translation = await client.complete(TRANSLATION_PROMPT.format(lang=lang, text=text))
+            except Exception as e:
+                logger.warning("Translation of %s failed: %s", entry, e,
+                               extra={"event": "translation_failed", "entry": entry, "error": str(e)})
+                results["failed"] += 1
+                return
+        cache.put(entry, lang, text, translation.strip().strip('"').strip())
+        results["translated"] += 1
+
+    await asyncio.gather(*(translate(entry, text) for entry, text in cache.pending(databases, lang)))
+    return results["translated"], results["failed"]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage cached translations of the static recipe SOPs.")
+    parser.add_argument("--base-dir", default=".")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_cmd = commands.add_parser("export", help="Write SOPs that still need a translation to JSONL")
+    export_cmd.add_argument("--lang", required=True)
+    export_cmd.add_argument("--output", default="pending_translations.jsonl")
+    import_cmd = commands.add_parser("import", help="Load translated JSONL rows into the cache")
+    import_cmd.add_argument("input")
+    translate_cmd = commands.add_parser("translate", help="Translate pending SOPs with an LLM client")
+    translate_cmd.add_argument("--lang", required=True)
+    translate_cmd.add_argument("--client", required=True, help="LLM client as module:ClassName (implements LLMClient)")
+    translate_cmd.add_argument("--concurrency", type=int, default=4)
+    commands.add_parser("status", help="Translated / pending counts per language")
+    commands.add_parser("prune", help="Drop translations of removed or edited SOPs")
+    args = parser.parse_args()
+
+    cache = TranslationCache(os.path.join(args.base_dir, TRANSLATIONS_FILE))
+    databases = load_sop_databases(args.base_dir)
+
+    if args.command == "export":
+        count = export_pending(cache, databases, args.lang, args.output)
+        print(f"Wrote {count} SOPs needing a {normalize_lang(args.lang)} translation to {args.output}")
+    elif args.command == "import":
+        imported, skipped = import_rows(cache, databases, args.input)
+        cache.save()
+        print(f"Imported {imported} translations ({skipped} skipped: empty or outdated) into {cache.path}")
+    elif args.command == "translate":
+        from llm_pipeline import load_client
+
+        translated, failed = asyncio.run(translate_pending(cache, databases, args.lang, load_client(args.client), args.concurrency))
+        cache.save()
+        print(f"Translated {translated} SOPs into {normalize_lang(args.lang)} ({failed} failed) -> {cache.path}")
+        exit(1 if failed else 0)
+    elif args.command == "prune":
+        removed = cache.prune(databases)
+        cache.save()
+        print(f"Removed {removed} outdated translations")
+    else:
+        total = sum(1 for _ in iter_sop_texts(databases))
+        print(f"{total} static SOPs")
+        for lang in sorted(cache.languages):
+            pending = len(cache.pending(databases, lang))
+            print(f"  {lang}: {total - pending} translated, {pending} pending")
@@ -0,0 +1,101 @@
+KEY_SUFFIX = ")"
+KEY_SEPARATOR = " ("
+
+# (dish type, keyword in the base title, order field holding the variant option)
+DISH_TYPES = [
+    ("Salad Meal", "Salad", "dressing_choice"),
+    ("Chinese Bowl", "Chinese", "carb_choice"),
+    ("Sandwich", "Sandwich", "sauce_choice"),
+]
+
+def parse_variant_key(key):
+    """
+    Split "C01-B Salad Meal (Paneer, Vinaigrette)" into
+    ("C01-B Salad Meal", "Paneer", "Vinaigrette"). Keys without a
+    parameter list return (key, None, None).
+    """
+    if not key.endswith(KEY_SUFFIX) or KEY_SEPARATOR not in key:
+        return key, None, None
+    base, _, params = key[:-len(KEY_SUFFIX)].rpartition(KEY_SEPARATOR)
+    protein, _, option = params.partition(", ")
+    return base, protein or None, option or None
+
+def dish_type_of(base_title):
+    for dish_type, keyword, option_field in DISH_TYPES:
+        if keyword in base_title:
+            return dish_type, option_field
+    return None, None
+
+class VariantIndex:
+    """
+    Structured view of custom_recipe_bank.json, built once per bank:
+    (base dish, protein, option) -> recipe key, plus the valid bases,
+    proteins and options per dish type, in bank order.
+    """
+    def __init__(self, recipe_bank):
+        self.recipe_bank = recipe_bank
+        self.variants = {}
+        self.base_types = {}
+        self.dish_types = {
+            dish_type: {"option_field": option_field, "bases": [], "proteins": [], "options": []}
+            for dish_type, _, option_field in DISH_TYPES
+        }
+        # base -> protein -> [options], for reporting what a given base supports
+        self.base_options = {}
+
+        for key in recipe_bank:
+            base, protein, option = parse_variant_key(key)
+            dish_type, _ = dish_type_of(base)
+            if dish_type is None or protein is None:
+                continue
+            self.variants[(base, protein, option)] = key
+            self.base_types[base] = dish_type
+            entry = self.dish_types[dish_type]
+            for field, value in (("bases", base), ("proteins", protein), ("options", option)):
+                if value is not None and value not in entry[field]:
+                    entry[field].append(value)
+            self.base_options.setdefault(base, {}).setdefault(protein, []).append(option)
+
+    def options(self, dish_type):
+        """{"option_field", "bases", "proteins", "options"} for a dish type."""
+        return self.dish_types[dish_type]
+
+    def lookup(self, base_title, protein, option):
+        """Recipe key for a variant tuple, or None."""
+        return self.variants.get((base_title, protein, option))
+
+    def validate(self, base_title, protein, option):
+        """List of human-readable problems with a requested combination (empty if it exists)."""
+        if (base_title, protein, option) in self.variants:
+            return []
+        if base_title not in self.base_options:
+            return [f"Unknown dish '{base_title}'. Valid dishes: {sorted(self.base_types)}"]
+
+        proteins = self.base_options[base_title]
+        if protein not in proteins:
+            return [f"Unknown protein '{protein}' for '{base_title}'. Valid proteins: {list(proteins)}"]
+        return [f"Unknown option '{option}' for '{base_title}' with {protein}. Valid options: {proteins[protein]}"]
+
+    def resolve(self, base_title, protein_choice=None, carb_choice=None, sauce_choice=None, dressing_choice=None):
+        """
+        Map create_prompt's custom_prefab kwargs to (lookup_key, problems).
+        lookup_key follows the legacy "{base} ({protein}, {option})" format so
+        not-found messages stay the same; problems is empty when the variant exists.
+        """
+        if base_title is None:
+            return None, ["No dish title given"]
+
+        dish_type, option_field = dish_type_of(base_title)
+        if dish_type is None:
+            # Plain recipe titles are looked up as-is
+            return base_title, [] if base_title in self.recipe_bank else [f"Unknown dish '{base_title}'"]
+
+        option = {
+            "dressing_choice": dressing_choice,
+            "carb_choice": carb_choice,
+            "sauce_choice": sauce_choice,
+        }[option_field]
+        key = self.lookup(base_title, protein_choice, option)
+        if key is not None:
+            return key, []
+        return f"{base_title} ({protein_choice}, {option})", self.validate(base_title, protein_choice, option)
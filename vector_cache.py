@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+from ingredient_vector import IngredientVector
+
+CACHE_DIR = ".macrochef_cache"
+CACHE_VERSION = 2
+
+def fingerprint_files(paths):
+    """Content hash over a list of files (missing files hash as empty)."""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(path.encode("utf-8"))
+        try:
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        except OSError:
+            digest.update(b"<missing>")
+    return digest.hexdigest()
+
+def stat_fingerprint(paths):
+    """Cheap change detector: (path, mtime_ns, size) per file, None if missing."""
+    fingerprint = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            fingerprint.append((path, st.st_mtime_ns, st.st_size))
+        except OSError:
+            fingerprint.append((path, None))
+    return tuple(fingerprint)
+
+def stat_stamps(paths):
+    """stat_fingerprint in JSON form, so a copy stored in a cache file compares equal."""
+    return [list(stamp) for stamp in stat_fingerprint(paths)]
+
+def iter_entry_lists(databases):
+    """Yield (db_name, entry_key, serving_key, active_ingredients) for every DB entry."""
+    for db_name, db in databases.items():
+        for entry_key, entry in db.items():
+            if not isinstance(entry, dict):
+                continue
+            if "active_ingredients" in entry:
+                yield db_name, entry_key, "", entry["active_ingredients"]
+                continue
+            for serving_key, serving in entry.items():
+                if isinstance(serving, dict):
+                    yield db_name, entry_key, serving_key, serving.get("active_ingredients", [])
+
+class VectorCache:
+    """
+    Precomputed ingredient vectors for every static DB entry of one plan,
+    keyed by (db_name, entry_key, serving_key). Carb entries have no serving
+    sizes and use serving_key "".
+
+    Vectors are held as IngredientVector bitsets and persisted in packed hex
+    form in CACHE_DIR/vectors_{plan}.json. The file is rebuilt
+    whenever the content hash of the ingredients CSV or any source JSON changes;
+    the sources are only hashed when their mtime/size differ from the stamps
+    stored with the file.
+    """
+    def __init__(self, customer_plan, matcher, databases, source_files, cache_dir=CACHE_DIR):
+        self.customer_plan = customer_plan
+        self.matcher = matcher
+        self.vector_length = len(matcher.master_list)
+        self.cache_path = os.path.join(cache_dir, f"vectors_{customer_plan}.json")
+        self.source_files = list(source_files)
+        self.stat = stat_stamps(self.source_files)
+        self.fingerprint = None
+        self._stored_stat = None
+
+        self.entries = self._load()
+        if self.entries is None:
+            if self.fingerprint is None:
+                self.fingerprint = fingerprint_files(self.source_files)
+            self.entries = self._build(databases)
+            self._save()
+        elif self._stored_stat != self.stat:
+            # Contents unchanged: store the new stamps so the next start skips the hash
+            self._save()
+
+        # Rendered "[0, 1, ...]" strings, filled on first use
+        self._rendered = {}
+
+    def _entry_lists(self, databases):
+        return iter_entry_lists(databases)
+
+    def _vectorize(self, active_list):
+        indices = []
+        unmatched = []
+        for item in active_list:
+            _, idx = self.matcher.match(item)
+            if idx != -1:
+                indices.append(idx)
+            else:
+                unmatched.append(item)
+        return IngredientVector.from_indices(indices, self.vector_length), unmatched
+
+    def _build(self, databases):
+        entries = {}
+        for db_name, entry_key, serving_key, active_list in self._entry_lists(databases):
+            entries[(db_name, entry_key, serving_key)] = self._vectorize(active_list)
+        return entries
+
+    def _load(self):
+        try:
+            with open(self.cache_path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != CACHE_VERSION or data.get("vector_length") != self.vector_length:
+            return None
+        if data.get("stat") == self.stat:
+            self.fingerprint = data.get("fingerprint")
+        else:
+            # Sources touched since the file was written: only a content change makes it stale
+            self.fingerprint = fingerprint_files(self.source_files)
+            if data.get("fingerprint") != self.fingerprint:
+                return None
+        self._stored_stat = data.get("stat")
+        return {
+            (row["db"], row["key"], row["serving"]):
+                (IngredientVector.from_hex(row["bits"], self.vector_length), row["unmatched"])
+            for row in data["entries"]
+        }
+
+    def _save(self):
+        data = {
+            "version": CACHE_VERSION,
+            "customer_plan": self.customer_plan,
+            "fingerprint": self.fingerprint,
+            "stat": self.stat,
+            "vector_length": self.vector_length,
+            "entries": [
+                {"db": db, "key": key, "serving": serving, "bits": vector.to_hex(), "unmatched": unmatched}
+                for (db, key, serving), (vector, unmatched) in self.entries.items()
+            ],
+        }
+        # Cache is an optimization only: a read-only checkout just keeps it in memory
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass
+
+    def vector(self, db_name, entry_key, serving_key=""):
+        """Return (IngredientVector, unmatched_list), or None if the entry is not cached."""
+        return self.entries.get((db_name, entry_key, serving_key))
+
+    def lookup(self, db_name, entry_key, serving_key=""):
+        """Return (vector_string, unmatched_list), or None if the entry is not cached."""
+        cache_key = (db_name, entry_key, serving_key)
+        if cache_key not in self.entries:
+            return None
+        if cache_key not in self._rendered:
+            vector, unmatched = self.entries[cache_key]
+            self._rendered[cache_key] = (vector.to_text(), unmatched)
+        return self._rendered[cache_key]
+
+if __name__ == "__main__":
+    # Offline prebuild: constructing a generator builds (or validates) its plan's cache file
+    from main import MacroChefGenerator
+
+    for plan in ("SUB", "DEMO"):
+        cache = MacroChefGenerator(customer_plan=plan).vector_cache
+        print(f"{plan}: {len(cache.entries)} vectors -> {cache.cache_path}")